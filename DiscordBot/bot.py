@@ -4,7 +4,8 @@ import discord
 from discord.ext import commands
 from discord.utils import get
 from dotenv import load_dotenv
-import json
+import atexit
+from username_store import UsernameStore
 
 # Load environment variables from .env
 load_dotenv()
@@ -21,15 +22,9 @@ bot = commands.Bot(intents=intents)
 
 USERNAMES_FILE = "usernames.json"
 
-def load_usernames():
-    if not os.path.exists(USERNAMES_FILE):
-        return {}
-    with open(USERNAMES_FILE, "r") as f:
-        return json.load(f)
-
-def save_usernames(data):
-    with open(USERNAMES_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+# In-memory usernames backed by an append-only log next to USERNAMES_FILE
+usernames = UsernameStore(USERNAMES_FILE)
+atexit.register(usernames.close)
 
 def is_verified(member):
     return any(role.name == "Verified" for role in member.roles)
@@ -39,6 +34,7 @@ def is_staff(member):
 
 @bot.event
 async def on_ready():
+    usernames.start()
     await bot.tree.sync()
     print(f"✅ Logged in as {bot.user}")
 
@@ -60,9 +56,7 @@ async def verify(interaction: discord.Interaction, roblox_username: str):
     if not is_verified(member):
         await interaction.response.send_message("❌ You must have the Verified role to use this command.", ephemeral=True)
         return
-    usernames = load_usernames()
-    usernames[str(member.id)] = roblox_username
-    save_usernames(usernames)
+    usernames.set(str(member.id), roblox_username)
     await interaction.response.send_message(f"✅ Your Roblox username `{roblox_username}` has been saved, {member.mention}!")
 
 # Ticket system slash command
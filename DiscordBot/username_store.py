@@ -0,0 +1,129 @@
+import os
+import json
+import asyncio
+
+class UsernameStore:
+    """Roblox usernames kept in memory and persisted to an append-only log.
+
+    ``usernames.json`` stays the compacted snapshot (same format as before);
+    every change is appended as one JSON line to ``usernames.json.log``. Reads
+    never touch the disk and a write is a dict update plus a buffered append.
+    A background task fsyncs the log in batches and, once it has grown past
+    ``compact_after`` entries, writes a fresh snapshot atomically and starts a
+    new log. At startup the snapshot is loaded and the logs replayed on top; a
+    torn final line from a crash is ignored.
+    """
+
+    def __init__(self, path, fsync_interval=1.0, compact_after=1000):
+        self.path = path
+        self.log_path = path + ".log"
+        self.old_log_path = path + ".log.old"
+        self.fsync_interval = fsync_interval
+        self.compact_after = compact_after
+        
+        self._data = {}
+        self._log_entries = 0
+        self._unsynced = 0
+        self._task = None
+        
+        self._load()
+        self._log = open(self.log_path, "a", encoding="utf-8")
+    
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        # A compaction interrupted by a crash leaves the previous log behind
+        for log_path in (self.old_log_path, self.log_path):
+            self._log_entries += self._replay(log_path)
+        if os.path.exists(self.old_log_path):
+            # Fold the old log into the snapshot now; the next compaction would overwrite it
+            self._write_snapshot(dict(self._data))
+    
+    def _replay(self, log_path):
+        if not os.path.exists(log_path):
+            return 0
+        entries = 0
+        good_end = 0
+        with open(log_path, "rb") as f:
+            for line in f:
+                # A line without its newline was cut short, even if it happens to parse
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self._data[entry["id"]] = entry["username"]
+                entries += 1
+                good_end += len(line)
+        
+        if good_end < os.path.getsize(log_path):
+            # Torn write from a crash: drop it so new appends don't land after garbage
+            print(f"⚠️ Discarding truncated entry at the end of {log_path}")
+            with open(log_path, "r+b") as f:
+                f.truncate(good_end)
+        return entries
+    
+    def get(self, user_id, default=None):
+        return self._data.get(user_id, default)
+    
+    def set(self, user_id, username):
+        self._data[user_id] = username
+        self._log.write(json.dumps({"id": user_id, "username": username}) + "\n")
+        self._log_entries += 1
+        self._unsynced += 1
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def start(self):
+        """Start the background fsync/compaction task (safe to call on every on_ready)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.fsync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"Error persisting usernames: {e}")
+    
+    async def sync(self):
+        if self._unsynced:
+            self._log.flush()
+            self._unsynced = 0
+            await asyncio.to_thread(os.fsync, self._log.fileno())
+        if self._log_entries >= self.compact_after:
+            await self.compact()
+    
+    async def compact(self):
+        # Rotate first so writes made while the snapshot is written land in the new log
+        snapshot = dict(self._data)
+        if os.path.exists(self.old_log_path):
+            # An earlier snapshot write failed; its entries exist only in the old log
+            await asyncio.to_thread(self._write_snapshot, snapshot)
+        self._log.close()
+        os.replace(self.log_path, self.old_log_path)
+        self._log = open(self.log_path, "a", encoding="utf-8")
+        self._log_entries = 0
+        await asyncio.to_thread(self._write_snapshot, snapshot)
+    
+    def _write_snapshot(self, snapshot):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        os.remove(self.old_log_path)
+    
+    def close(self):
+        """Flush and fsync synchronously; used at shutdown"""
+        if self._task is not None:
+            self._task.cancel()
+        if not self._log.closed:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._log.close()
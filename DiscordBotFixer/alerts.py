@@ -0,0 +1,207 @@
+import time
+import asyncio
+import inspect
+from metrics import registry
+from ratelimit import TokenBucket
+
+EMERGENCY_ALERTS = registry.counter(
+    'bot_emergency_alerts_total', 'Emergency triggers by outcome (sent, merged, repeated; delayed when a new alert waited for a token)', ('outcome',))
+EMERGENCY_TIME_TO_ALERT = registry.histogram(
+    'bot_emergency_time_to_alert_seconds', 'Time from an emergency trigger until its alert message was sent')
+EMERGENCY_LOOKUPS = registry.counter(
+    'bot_emergency_username_lookups_total', 'Roblox username lookups made after an alert went out, by outcome', ('outcome',))
+
+# Username placeholder while a lookup is still running
+LOOKING_UP = object()
+
+class _Alert:
+    __slots__ = ('entries', 'repeats', 'message', 'last_trigger', 'dirty', 'edit_task')
+
+    def __init__(self, now):
+        self.entries = {}  # user ID -> (mention, roblox username, None or LOOKING_UP), in trigger order
+        self.repeats = {}  # user ID -> triggers merged in after their first
+        self.message = None
+        self.last_trigger = now
+        self.dirty = False
+        self.edit_task = None
+
+class EmergencyAlerter:
+    """Coalesces bursts of emergency triggers into one alert per channel.
+
+    The first trigger in a channel sends an alert (and pings). Further triggers
+    in the same channel within ``window`` seconds of the last one are merged
+    into that alert, which is edited in place after ``edit_delay`` so a burst
+    costs one edit; edits don't re-ping. A user who triggers again, in any
+    channel, within ``window`` seconds of the trigger that first put them in an
+    alert is counted as a repeat on that alert instead; repeats don't move the
+    user's window, so someone who keeps asking gets a fresh alert once it has
+    passed. New alert messages per channel are also limited by a token bucket;
+    when it is empty the new alert waits for the next token, and triggers in
+    that channel merge into it meanwhile. No trigger is ever dropped.
+    
+    When the Roblox username isn't known yet, the caller passes a ``lookup``
+    instead. The alert goes out straight away with the username shown as
+    ``LOOKING_UP``. The lookup runs concurrently, limited to ``lookup_timeout``
+    seconds, and the alert is edited as soon as it resolves.
+    """
+
+    def __init__(self, render, send=None, window=30.0, burst=3, refill_per_second=1 / 20, edit_delay=1.0,
+                 lookup_timeout=1.0, clock=time.monotonic):
+        self.render = render
+        # send(channel, content) -> awaitable Message; lets callers route alerts through a scheduler
+        self.send = send or (lambda channel, content: channel.send(content))
+        self.window = window
+        self.burst = burst
+        self.refill_per_second = refill_per_second
+        self.edit_delay = edit_delay
+        self.lookup_timeout = lookup_timeout
+        self._clock = clock
+        self._alerts = {}   # channel ID -> _Alert
+        self._buckets = {}  # channel ID -> TokenBucket
+        self._users = {}    # user ID -> (time they joined an alert, channel, that alert)
+        self._next_prune = clock() + window
+    
+    async def trigger(self, channel, author, roblox_username=None, lookup=None):
+        """Alert for ``author``; ``lookup`` is an awaitable for the username if it isn't known yet"""
+        now = self._clock()
+        self._prune(now)
+        lookup_task = None
+        if lookup is not None:
+            # Start the lookup before anything else so it overlaps with the send
+            lookup_task = asyncio.ensure_future(asyncio.wait_for(lookup, self.lookup_timeout))
+            roblox_username = LOOKING_UP
+        
+        previous = self._users.get(author.id)
+        if previous is not None and now - previous[0] < self.window:
+            last_channel, last_alert = previous[1], previous[2]
+            if self._alerts.get(last_channel.id) is last_alert and author.id in last_alert.entries:
+                # Same user again: note it on their alert without moving their window
+                if lookup_task is not None:
+                    self._abandon(lookup, lookup_task)
+                last_alert.repeats[author.id] = last_alert.repeats.get(author.id, 0) + 1
+                last_alert.dirty = True
+                EMERGENCY_ALERTS.inc(outcome='repeated')
+                if last_alert.message is not None:
+                    self._schedule_edit(last_channel, last_alert)
+                return
+        
+        alert = self._alerts.get(channel.id)
+        # An alert still waiting to be sent takes every trigger in its channel
+        within_window = alert is not None and (alert.message is None or now - alert.last_trigger < self.window)
+        if not within_window:
+            # Never dropped: with the bucket empty the new alert waits for a token instead
+            try:
+                await self._send_new(channel, author, roblox_username, now)
+            except Exception:
+                if lookup_task is not None:
+                    self._abandon(lookup, lookup_task)
+                raise
+        else:
+            alert.entries[author.id] = (author.mention, roblox_username)
+            alert.repeats.pop(author.id, None)
+            self._users[author.id] = (now, channel, alert)
+            alert.last_trigger = now
+            alert.dirty = True
+            EMERGENCY_ALERTS.inc(outcome='merged')
+            # While the initial send is in flight it schedules the edit itself once it completes
+            if alert.message is not None:
+                self._schedule_edit(channel, alert)
+        
+        if lookup_task is not None:
+            await self._resolve(channel, author, lookup_task)
+    
+    @staticmethod
+    def _abandon(lookup, lookup_task):
+        lookup_task.cancel()
+        # A task cancelled before it ran never awaits the lookup; close it so it isn't reported as never awaited
+        if inspect.iscoroutine(lookup) and inspect.getcoroutinestate(lookup) == inspect.CORO_CREATED:
+            lookup.close()
+    
+    async def _resolve(self, channel, author, lookup_task):
+        try:
+            roblox_username = await lookup_task
+            EMERGENCY_LOOKUPS.inc(outcome='found' if roblox_username else 'not_found')
+        except asyncio.TimeoutError:
+            EMERGENCY_LOOKUPS.inc(outcome='timeout')
+            roblox_username = None
+        except Exception as e:
+            print(f"Error looking up Roblox username for emergency alert: {e}")
+            EMERGENCY_LOOKUPS.inc(outcome='error')
+            roblox_username = None
+        
+        alert = self._alerts.get(channel.id)
+        if alert is None or alert.entries.get(author.id, (None, None))[1] is not LOOKING_UP:
+            return
+        alert.entries[author.id] = (author.mention, roblox_username)
+        alert.dirty = True
+        if alert.message is not None:
+            self._schedule_edit(channel, alert, delay=0)
+    
+    def _bucket(self, channel_id):
+        bucket = self._buckets.get(channel_id)
+        if bucket is None:
+            bucket = self._buckets[channel_id] = TokenBucket(self.burst, self.refill_per_second, self._clock)
+        return bucket
+    
+    async def _send_new(self, channel, author, roblox_username, now):
+        # Registered before the send so triggers arriving meanwhile merge into it
+        alert = self._alerts[channel.id] = _Alert(now)
+        alert.entries[author.id] = (author.mention, roblox_username)
+        self._users[author.id] = (now, channel, alert)
+        bucket = self._bucket(channel.id)
+        if not bucket.try_take():
+            EMERGENCY_ALERTS.inc(outcome='delayed')
+            # An infinite delay (no refill) would never end; send anyway then
+            while bucket.delay() != float('inf'):
+                await asyncio.sleep(bucket.delay())
+                if bucket.try_take():
+                    break
+        # Triggers merged in while waiting are part of this send; no edit needed for them
+        alert.dirty = False
+        try:
+            alert.message = await self.send(channel, self._render(channel, alert))
+        except Exception:
+            if self._alerts.get(channel.id) is alert:
+                del self._alerts[channel.id]
+            raise
+        EMERGENCY_ALERTS.inc(outcome='sent')
+        EMERGENCY_TIME_TO_ALERT.observe(self._clock() - now)
+        if alert.dirty:
+            self._schedule_edit(channel, alert)
+    
+    def _schedule_edit(self, channel, alert, delay=None):
+        if alert.edit_task is None or alert.edit_task.done():
+            delay = self.edit_delay if delay is None else delay
+            alert.edit_task = asyncio.get_running_loop().create_task(self._edit_later(channel, alert, delay))
+    
+    async def _edit_later(self, channel, alert, delay):
+        # Keep going until no trigger arrived during the last edit
+        while alert.dirty:
+            await asyncio.sleep(delay)
+            delay = self.edit_delay
+            alert.dirty = False
+            try:
+                await alert.message.edit(content=self._render(channel, alert))
+            except Exception as e:
+                print(f"Error updating emergency alert: {e}")
+                return
+    
+    def _render(self, channel, alert):
+        entries = []
+        for user_id, (mention, roblox_username) in alert.entries.items():
+            repeats = alert.repeats.get(user_id)
+            if repeats:
+                mention = f"{mention} (asked {repeats + 1} times)"
+            entries.append((mention, roblox_username))
+        return self.render(channel.guild, entries)
+    
+    def _prune(self, now):
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.window
+        self._users = {uid: entry for uid, entry in self._users.items() if now - entry[0] < self.window}
+        self._alerts = {cid: a for cid, a in self._alerts.items()
+                        if now - a.last_trigger < self.window or a.message is None}
+        # A bucket that has been idle this long is full again; recreate it lazily
+        idle = self.burst / self.refill_per_second if self.refill_per_second else float('inf')
+        self._buckets = {cid: b for cid, b in self._buckets.items() if now - b._updated < idle}
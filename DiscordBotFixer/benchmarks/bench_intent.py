@@ -0,0 +1,61 @@
+"""Micro-benchmark: legacy is_yes_response/is_no_response vs IntentClassifier.
+
+Run from DiscordBotFixer/:  python benchmarks/bench_intent.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from intent import IntentClassifier, YES, NO, AMBIGUOUS
+
+# Verbatim copies of the functions the classifier replaced
+def is_yes_response(text):
+    text = text.lower().strip()
+    yes_patterns = [
+        r'^yes$', r'^y$', r'^yeah$', r'^yep$', r'^yup$', r'^sure$', r'^ok$', r'^okay$',
+        r'^definitely$', r'^absolutely$', r'^correct$', r'^right$', r'^true$',
+        r'yes\b', r'\byes\b', r'yeah\b', r'\byeah\b'
+    ]
+    return any(re.search(pattern, text) for pattern in yes_patterns)
+
+def is_no_response(text):
+    text = text.lower().strip()
+    no_patterns = [
+        r'^no$', r'^n$', r'^nope$', r'^nah$', r'^never$', r'^not$', r'^negative$',
+        r'^incorrect$', r'^wrong$', r'^false$',
+        r'no\b', r'\bno\b', r'nope\b', r'\bnope\b', r'not\b', r'\bnot\b'
+    ]
+    return any(re.search(pattern, text) for pattern in no_patterns)
+
+def legacy_classify(text):
+    if is_yes_response(text):
+        return YES
+    if is_no_response(text):
+        return NO
+    return AMBIGUOUS
+
+SAMPLES = [
+    "yes", "Yes!", "no", "nope", "ok", "yes not really", "no i just have a question",
+    "i want to report someone who scammed me in the trade yesterday",
+    "hello? is anyone there, i have been waiting for a while now and nobody answered",
+    "yeah he was teaming with the other crew",
+]
+
+def main(number=20000):
+    classifier = IntentClassifier()
+    
+    print(f"{'reply':<45} {'legacy':>10} {'new':>10}")
+    for text in SAMPLES:
+        print(f"{text[:44]:<45} {legacy_classify(text):>10} {classifier.classify(text):>10}")
+    print()
+    
+    for name, func in (("legacy", legacy_classify), ("classifier", classifier.classify)):
+        seconds = timeit.timeit(lambda: [func(t) for t in SAMPLES], number=number)
+        per_call = seconds / (number * len(SAMPLES)) * 1e6
+        print(f"{name:<12} {per_call:8.2f} us/reply")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
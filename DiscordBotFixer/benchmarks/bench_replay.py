@@ -0,0 +1,245 @@
+"""Offline replay benchmark for the bot's handlers.
+
+Feeds synthetic guilds, members, roles, channels and messages through the real
+``on_message``, ``/ticket`` and ``/roblox_verify`` handlers of bot.py or
+bot_safe.py. Discord objects are fakes and PostgreSQL is replaced by an
+in-memory stand-in underneath psycopg2.connect, so nothing touches the network.
+
+Run from DiscordBotFixer/:
+
+    python benchmarks/bench_replay.py --bot bot --messages 20000
+    python benchmarks/bench_replay.py --db-latency-ms 5 --inline-db   # old blocking behaviour
+
+Reports throughput, p50/p99 handler latency and database queries per event.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import importlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, HERE)
+
+import psycopg2
+
+from fakes import FakeAPI, FakeDatabase, FakeInteraction, FakeMessage, build_guild
+
+EMERGENCY_MESSAGES = [
+    "im getting jumped at spawn",
+    "NEED HELP at the bank!!",
+    "gettin jumped by 3 ppl",
+    "pls i need help now",
+]
+TICKET_REPLIES = ["yes", "no", "yeah he scammed me", "nope just a question", "hello?", "ok"]
+CHATTER = [
+    "anyone up for a raid later",
+    "gg that was close",
+    "what time is the event tonight, i want to bring a friend along with me",
+    "lol",
+    "did anyone see the update notes",
+    "i helped him yesterday with the quest",
+]
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+class Phase:
+    def __init__(self, name, fake_db, api):
+        self.name = name
+        self.fake_db = fake_db
+        self.api = api
+        self.latencies = []
+        self.errors = 0
+
+    def __enter__(self):
+        self._queries = self.fake_db.queries
+        self._api_calls = self.api.calls
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+        self.queries = self.fake_db.queries - self._queries
+        self.api_calls = self.api.calls - self._api_calls
+        return False
+
+    async def timed(self, coro):
+        start = time.perf_counter()
+        try:
+            await coro
+        except Exception as e:
+            self.errors += 1
+            print(f"  ! {self.name}: {type(e).__name__}: {e}")
+        self.latencies.append(time.perf_counter() - start)
+
+    def report(self):
+        count = len(self.latencies)
+        rate = count / self.elapsed if self.elapsed else 0.0
+        per_event = self.queries / count if count else 0.0
+        print(
+            f"{self.name:<14} {count:>7} {rate:>11.0f}/s "
+            f"{percentile(self.latencies, 50) * 1000:>9.3f} {percentile(self.latencies, 99) * 1000:>9.3f} "
+            f"{per_event:>10.3f} {self.api_calls / count if count else 0.0:>9.2f} {self.errors:>6}"
+        )
+
+async def run_concurrently(phase, coros, concurrency):
+    """Dispatch like discord.py does (one task per event), capped at ``concurrency`` in flight"""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(coro):
+        async with slots:
+            await phase.timed(coro)
+
+    await asyncio.gather(*(one(c) for c in coros))
+
+async def replay(bot_module, fake_db, api, args):
+    rng = random.Random(args.seed)
+    guilds = [
+        build_guild(f"guild {g}", api, members=args.members, filler_roles=args.roles, filler_channels=args.channels)
+        for g in range(args.guilds)
+    ]
+
+    bot_module.loop_monitor.start()
+    await bot_module.tickets.start()
+    
+    # Pre-fill the ticket channel pool (untimed), as the background refill would have
+    for guild in guilds:
+        for _ in range(args.ticket_pool):
+            await bot_module.ticket_pool.create(guild)
+
+    phases = []
+
+    # /roblox_verify for most verified members
+    with Phase("roblox_verify", fake_db, api) as phase:
+        coros = []
+        for guild in guilds:
+            for i, member in enumerate(guild.members):
+                if rng.random() < args.verify_ratio:
+                    interaction = FakeInteraction(member, guild.general)
+                    coros.append(bot_module.roblox_verify.callback(interaction, f"roblox_user_{i}"))
+        await run_concurrently(phase, coros, args.concurrency)
+    phases.append(phase)
+
+    # /ticket, including some duplicate invocations
+    ticket_channels = []
+    with Phase("ticket", fake_db, api) as phase:
+        openers = []
+        for guild in guilds:
+            openers.extend(rng.sample(guild.members, max(1, int(len(guild.members) * args.ticket_ratio))))
+        interactions = [FakeInteraction(member, member.guild.general) for member in openers + openers[: len(openers) // 4]]
+        
+        async def invoke(interaction):
+            # Time from when Discord would deliver it, not from when it was queued here
+            interaction.created = time.perf_counter()
+            await bot_module.ticket.callback(interaction)
+        
+        coros = [invoke(interaction) for interaction in interactions]
+        await run_concurrently(phase, coros, args.concurrency)
+        await bot_module.tickets.flush()
+    phases.append(phase)
+    ticket_timings = {
+        "acknowledged": [i.first_response for i in interactions if i.first_response is not None],
+        "final reply": [i.last_response for i in interactions if i.last_response is not None],
+    }
+
+    for guild in guilds:
+        for channel in guild.text_channels:
+            if channel.name.startswith(bot_module.TICKET_PREFIX):
+                owner = next((t for t in channel.overwrites if getattr(t, 'bot', True) is False), None)
+                if owner is not None:
+                    ticket_channels.append((channel, owner))
+
+    # Message replay: ticket replies, emergencies and normal chatter
+    kinds = {"ticket_reply": [], "emergency": [], "chatter": []}
+    for _ in range(args.messages):
+        roll = rng.random()
+        if ticket_channels and roll < args.ticket_reply_ratio:
+            channel, owner = rng.choice(ticket_channels)
+            kinds["ticket_reply"].append(FakeMessage(channel, owner, rng.choice(TICKET_REPLIES)))
+        elif roll < args.ticket_reply_ratio + args.emergency_ratio:
+            guild = rng.choice(guilds)
+            kinds["emergency"].append(FakeMessage(guild.general, rng.choice(guild.members), rng.choice(EMERGENCY_MESSAGES)))
+        else:
+            guild = rng.choice(guilds)
+            kinds["chatter"].append(FakeMessage(guild.general, rng.choice(guild.members), rng.choice(CHATTER)))
+
+    for kind, messages in kinds.items():
+        with Phase(kind, fake_db, api) as phase:
+            await run_concurrently(phase, (bot_module.on_message(m) for m in messages), args.concurrency)
+            await bot_module.tickets.flush()
+        phases.append(phase)
+
+    all_messages = Phase("on_message", fake_db, api)
+    all_messages.latencies = [l for p in phases if p.name in kinds for l in p.latencies]
+    all_messages.elapsed = sum(p.elapsed for p in phases if p.name in kinds)
+    all_messages.queries = sum(p.queries for p in phases if p.name in kinds)
+    all_messages.api_calls = sum(p.api_calls for p in phases if p.name in kinds)
+    all_messages.errors = sum(p.errors for p in phases if p.name in kinds)
+    phases.append(all_messages)
+
+    print(f"{'phase':<14} {'events':>7} {'throughput':>13} {'p50 ms':>9} {'p99 ms':>9} {'queries/ev':>10} {'api/ev':>9} {'errors':>6}")
+    for phase in phases:
+        phase.report()
+
+    print("\n/ticket interaction latency (from invocation)")
+    for name, samples in ticket_timings.items():
+        print(f"  {name:<13} p50 {percentile(samples, 50) * 1000:8.1f}ms  p99 {percentile(samples, 99) * 1000:8.1f}ms")
+    
+    lag = bot_module.loop_monitor.snapshot()
+    print(f"\nevent loop lag: p99 {lag['p99_ms']:.1f}ms, max {lag['max_ms']:.1f}ms")
+    print(f"db connections opened: {fake_db.connections}, total queries: {fake_db.queries}")
+    bot_module.loop_monitor.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bot", default="bot", choices=("bot", "bot_safe"))
+    parser.add_argument("--guilds", type=int, default=5)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--roles", type=int, default=50, help="filler roles per guild")
+    parser.add_argument("--channels", type=int, default=100, help="filler channels per guild")
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=32, help="events in flight at once")
+    parser.add_argument("--verify-ratio", type=float, default=0.7)
+    parser.add_argument("--ticket-ratio", type=float, default=0.1)
+    parser.add_argument("--ticket-reply-ratio", type=float, default=0.2)
+    parser.add_argument("--emergency-ratio", type=float, default=0.05)
+    parser.add_argument("--db-latency-ms", type=float, default=1.0, help="simulated time per SQL statement")
+    parser.add_argument("--api-latency-ms", type=float, default=0.0, help="simulated time per Discord API call")
+    parser.add_argument("--create-channel-latency-ms", type=float, default=None)
+    parser.add_argument("--ticket-pool", type=int, default=0, help="pre-created ticket channels per guild")
+    parser.add_argument("--inline-db", action="store_true", help="run queries on the event loop (DB_ASYNC=false)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DISCORD_TOKEN", "benchmark")
+    os.environ.setdefault("DATABASE_URL", "postgresql://benchmark/benchmark")
+    os.environ["DB_ASYNC"] = "false" if args.inline_db else "true"
+    os.environ.setdefault("LOOP_LAG_WARN_MS", "100000")
+    os.environ["TICKET_POOL_SIZE"] = str(args.ticket_pool)
+
+    fake_db = FakeDatabase(latency=args.db_latency_ms / 1000)
+    psycopg2.connect = fake_db.connect
+    create_latency = args.create_channel_latency_ms
+    api = FakeAPI(
+        latency=args.api_latency_ms / 1000,
+        create_channel_latency=None if create_latency is None else create_latency / 1000,
+    )
+
+    bot_module = importlib.import_module(args.bot)
+
+    # Prefix command dispatch needs a logged-in client; no prefix commands are registered anyway
+    async def process_commands(message):
+        return None
+    bot_module.bot.process_commands = process_commands
+
+    asyncio.run(replay(bot_module, fake_db, api, args))
+
+if __name__ == "__main__":
+    main()
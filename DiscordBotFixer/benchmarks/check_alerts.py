@@ -0,0 +1,83 @@
+"""Behaviour checks for emergency alert coalescing.
+
+Drives the real EmergencyAlerter with fake channels and members and checks its
+guarantees: a burst becomes one alert, a user repeating themselves is neither
+muted nor re-pinged, and no trigger is ever dropped when the token bucket is
+empty. Windows and refill rates are scaled down to fractions of a second, so
+the whole run takes a few seconds.
+
+Run from DiscordBotFixer/:
+
+    python benchmarks/check_alerts.py
+
+Exits non-zero if any check fails.
+"""
+import os
+import sys
+import asyncio
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, HERE)
+
+from alerts import EmergencyAlerter
+from fakes import FakeAPI, build_guild
+
+def render(guild, entries):
+    return " ".join(mention for mention, _ in entries)
+
+def mentioned(channel, member):
+    return any(member.mention in message.content for message in channel.sent)
+
+async def check_burst():
+    """Ten users in one channel at once: one alert, edited to name all of them"""
+    guild = build_guild("burst", FakeAPI(), members=10, filler_roles=0, filler_channels=0)
+    alerter = EmergencyAlerter(render, window=1.0, edit_delay=0.05)
+    await asyncio.gather(*(alerter.trigger(guild.general, member, "rbx") for member in guild.members))
+    await asyncio.sleep(0.2)
+    sent = guild.general.sent
+    ok = len(sent) == 1 and all(mentioned(guild.general, member) for member in guild.members)
+    return ok, f"{len(sent)} alerts, {sent[0].edits if sent else 0} edits"
+
+async def check_repeats():
+    """One user every 0.25s with a 0.3s window: a fresh alert once the window passed, repeats as edits"""
+    guild = build_guild("repeats", FakeAPI(), members=1, filler_roles=0, filler_channels=0)
+    member = guild.members[0]
+    alerter = EmergencyAlerter(render, window=0.3, edit_delay=0.0)
+    for _ in range(6):
+        await alerter.trigger(guild.general, member, "rbx")
+        await asyncio.sleep(0.25)
+    sent = guild.general.sent
+    edits = sum(message.edits for message in sent)
+    ok = len(sent) == 3 and edits == 3 and all("asked 2 times" in message.content for message in sent)
+    return ok, f"{len(sent)} alerts, {edits} edits"
+
+async def check_empty_bucket():
+    """Window shorter than the refill: later triggers wait for a token instead of being dropped"""
+    guild = build_guild("bucket", FakeAPI(), members=4, filler_roles=0, filler_channels=0)
+    alerter = EmergencyAlerter(render, window=0.05, burst=1, refill_per_second=1 / 0.6, edit_delay=0.0)
+    triggers = []
+    for member in guild.members:
+        triggers.append(asyncio.ensure_future(alerter.trigger(guild.general, member, "rbx")))
+        await asyncio.sleep(0.06)
+    await asyncio.gather(*triggers)
+    await asyncio.sleep(0.05)
+    missing = [member.name for member in guild.members if not mentioned(guild.general, member)]
+    ok = not missing and len(guild.general.sent) == 2
+    return ok, f"{len(guild.general.sent)} alerts, missing: {', '.join(missing) or 'none'}"
+
+CHECKS = [check_burst, check_repeats, check_empty_bucket]
+
+async def run():
+    failed = 0
+    for check in CHECKS:
+        ok, detail = await check()
+        failed += not ok
+        print(f"{'PASS' if ok else 'FAIL'}  {check.__name__}: {detail}")
+    return failed
+
+def main():
+    sys.exit(1 if asyncio.run(run()) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Behaviour checks for ticket yes/no replies.
+
+Drives the real ``on_message`` handler of bot.py (or bot_safe.py) against
+fake channels and the in-memory PostgreSQL stand-in, and checks that a ticket
+only ever moves on once: concurrent replies get exactly one staff ping, also
+while the ticket's row is still being written, and a reply in this process
+gets none once another process has already moved the ticket on.
+
+Run from DiscordBotFixer/:
+
+    python benchmarks/check_tickets.py --bot bot
+
+Exits non-zero if any check fails.
+"""
+import os
+import sys
+import asyncio
+import argparse
+import importlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, HERE)
+
+import psycopg2
+
+from fakes import FakeAPI, FakeDatabase, FakeMessage, build_guild
+
+REPLIES = ["yes", "no", "yes", "no"]
+
+def open_ticket(bot_module, name):
+    guild = build_guild(name, FakeAPI(), members=1, filler_roles=0, filler_channels=0)
+    owner = guild.members[0]
+    channel = guild.add_text_channel(f"{bot_module.TICKET_PREFIX}{owner.name}")
+    bot_module.tickets.open(owner.id, channel.id)
+    return channel, owner
+
+def pings(channel):
+    return [message.content for message in channel.sent if "otw" in message.content]
+
+async def check_concurrent_replies(bot_module, fake_db):
+    """Four yes/no replies at once on a ticket whose row is written: one staff ping"""
+    channel, owner = open_ticket(bot_module, "concurrent")
+    await bot_module.tickets.flush()
+    await asyncio.gather(*(bot_module.on_message(FakeMessage(channel, owner, reply)) for reply in REPLIES))
+    sent = pings(channel)
+    state = fake_db.tickets[channel.id]['conversation_state']
+    ok = len(sent) == 1 and state == bot_module.tickets.peek(channel.id)['conversation_state']
+    return ok, f"{len(sent)} pings, database state {state}"
+
+async def check_row_not_written(bot_module, fake_db):
+    """The same replies before the ticket's INSERT has run: still one ping, and the row catches up"""
+    channel, owner = open_ticket(bot_module, "unwritten")
+    unwritten = channel.id not in fake_db.tickets
+    await asyncio.gather(*(bot_module.on_message(FakeMessage(channel, owner, reply)) for reply in REPLIES))
+    await bot_module.tickets.flush()
+    sent = pings(channel)
+    state = fake_db.tickets[channel.id]['conversation_state']
+    ok = unwritten and len(sent) == 1 and state == bot_module.tickets.peek(channel.id)['conversation_state']
+    return ok, f"{len(sent)} pings, database state {state}"
+
+async def check_other_process(bot_module, fake_db):
+    """Another process moved the ticket on first: a reply here sees it in the database and stays quiet"""
+    channel, owner = open_ticket(bot_module, "other process")
+    await bot_module.tickets.flush()
+    other = bot_module.TicketStateStore(bot_module.db)
+    await other.start()
+    won = await other.transition(channel.id, 'general_help', False)
+    await bot_module.on_message(FakeMessage(channel, owner, "yes"))
+    sent = pings(channel)
+    state = fake_db.tickets[channel.id]['conversation_state']
+    ok = won and not sent and state == 'general_help'
+    return ok, f"other process transitioned: {won}, {len(sent)} pings here, database state {state}"
+
+CHECKS = [check_concurrent_replies, check_row_not_written, check_other_process]
+
+async def run(bot_module, fake_db):
+    await bot_module.tickets.start()
+    failed = 0
+    for check in CHECKS:
+        ok, detail = await check(bot_module, fake_db)
+        failed += not ok
+        print(f"{'PASS' if ok else 'FAIL'}  {check.__name__}: {detail}")
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bot", default="bot", choices=("bot", "bot_safe"))
+    parser.add_argument("--db-latency-ms", type=float, default=2.0, help="simulated time per SQL statement")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DISCORD_TOKEN", "check")
+    os.environ.setdefault("DATABASE_URL", "postgresql://check/check")
+    os.environ["DB_ASYNC"] = "true"
+    os.environ.setdefault("LOOP_LAG_WARN_MS", "100000")
+    os.environ["TICKET_POOL_SIZE"] = "0"
+
+    fake_db = FakeDatabase(latency=args.db_latency_ms / 1000)
+    psycopg2.connect = fake_db.connect
+    bot_module = importlib.import_module(args.bot)
+
+    # Prefix command dispatch needs a logged-in client; no prefix commands are registered anyway
+    async def process_commands(message):
+        return None
+    bot_module.bot.process_commands = process_commands
+
+    sys.exit(1 if asyncio.run(run(bot_module, fake_db)) else 0)
+
+if __name__ == "__main__":
+    main()
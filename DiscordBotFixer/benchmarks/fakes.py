@@ -0,0 +1,456 @@
+"""Minimal stand-ins for discord.py objects and the PostgreSQL driver.
+
+Only the attributes and coroutines the bot's handlers actually touch are
+implemented. The fake database sits underneath psycopg2.connect, so the real
+DatabaseManager (pool, cache, SQL) is exercised end to end.
+"""
+import re
+import time
+import asyncio
+import itertools
+import socket
+import threading
+
+_ids = itertools.count(1_000_000_000_000_000)
+
+def next_id():
+    return next(_ids)
+
+# ---------------------------------------------------------------------------
+# Discord
+# ---------------------------------------------------------------------------
+
+class FakeRole:
+    def __init__(self, guild, name):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.mention = f"<@&{self.id}>"
+
+    def __hash__(self):
+        return hash(self.id)
+
+class FakeMember:
+    def __init__(self, guild, name, roles=(), bot=False):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{self.id}>"
+        self.bot = bot
+        self.roles = [guild.default_role, *roles]
+        self._role_ids = {role.id for role in self.roles}
+
+    def get_role(self, role_id):
+        return self.guild.get_role(role_id) if role_id in self._role_ids else None
+
+    def __hash__(self):
+        return hash(self.id)
+
+class FakeMessage:
+    def __init__(self, channel, author, content):
+        self.id = next_id()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.created_at = None
+        self.attachments = []
+        self.edits = 0
+
+    async def edit(self, content=None, **kwargs):
+        await self.channel.api.call()
+        self.edits += 1
+        if content is not None:
+            self.content = content
+        return self
+
+class FakeTextChannel:
+    def __init__(self, guild, name, overwrites=None, topic=None, category=None):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.topic = topic
+        self.category = category
+        self.overwrites = dict(overwrites or {})
+        self.mention = f"<#{self.id}>"
+        self.api = guild.api
+        self.sent = []
+        self.deleted = False
+
+    async def send(self, content=None, **kwargs):
+        await self.api.call()
+        message = FakeMessage(self, self.guild.me, content)
+        self.sent.append(message)
+        return message
+
+    async def edit(self, **kwargs):
+        await self.api.call()
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+        return self
+
+    async def delete(self, reason=None):
+        await self.api.call()
+        self.deleted = True
+        self.guild._remove_channel(self)
+
+    async def history(self, limit=100, oldest_first=False, before=None, after=None):
+        messages = list(self.sent)
+        if not oldest_first:
+            messages.reverse()
+        for message in messages[:limit]:
+            yield message
+
+class FakeGuild:
+    def __init__(self, name, api):
+        self.id = next_id()
+        self.name = name
+        self.api = api
+        self._roles = {}
+        self.default_role = self._add_role("@everyone")
+        self.me = None
+        self.members = []
+        self.text_channels = []
+        self._channels = {}
+
+    def _add_role(self, name):
+        role = FakeRole(self, name)
+        self._roles[role.id] = role
+        return role
+
+    def _remove_channel(self, channel):
+        self._channels.pop(channel.id, None)
+        if channel in self.text_channels:
+            self.text_channels.remove(channel)
+
+    @property
+    def roles(self):
+        return list(self._roles.values())
+
+    def get_role(self, role_id):
+        return self._roles.get(role_id)
+
+    def get_channel(self, channel_id):
+        return self._channels.get(channel_id)
+
+    def get_member(self, member_id):
+        for member in self.members:
+            if member.id == member_id:
+                return member
+        return None
+
+    def add_text_channel(self, name, overwrites=None, topic=None, category=None):
+        channel = FakeTextChannel(self, name, overwrites, topic, category)
+        self._channels[channel.id] = channel
+        self.text_channels.append(channel)
+        return channel
+
+    async def create_text_channel(self, name, overwrites=None, topic=None, category=None, reason=None, **kwargs):
+        await self.api.call(self.api.create_channel_latency)
+        return self.add_text_channel(name, overwrites, topic, category)
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def send_message(self, content=None, ephemeral=False, **kwargs):
+        if self._done:
+            raise RuntimeError("Interaction already responded to")
+        await self._interaction.api.call()
+        self._done = True
+        self._interaction.replies.append(content)
+        self._interaction.mark_response()
+
+    async def defer(self, ephemeral=False, thinking=False):
+        if self._done:
+            raise RuntimeError("Interaction already responded to")
+        await self._interaction.api.call()
+        self._done = True
+        self._interaction.mark_response()
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, ephemeral=False, **kwargs):
+        await self._interaction.api.call()
+        self._interaction.replies.append(content)
+        self._interaction.mark_response()
+
+class FakeInteraction:
+    def __init__(self, member, channel):
+        self.user = member
+        self.guild = member.guild
+        self.channel = channel
+        self.api = member.guild.api
+        self.replies = []
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.created = time.perf_counter()
+        self.first_response = None  # seconds until the interaction was acknowledged
+        self.last_response = None   # seconds until the final reply (e.g. the channel link)
+    
+    def mark_response(self):
+        elapsed = time.perf_counter() - self.created
+        if self.first_response is None:
+            self.first_response = elapsed
+        self.last_response = elapsed
+
+class FakeAPI:
+    """Simulated Discord REST latency; counts every call"""
+
+    def __init__(self, latency=0.0, create_channel_latency=None):
+        self.latency = latency
+        self.create_channel_latency = latency if create_channel_latency is None else create_channel_latency
+        self.calls = 0
+
+    async def call(self, latency=None):
+        self.calls += 1
+        latency = self.latency if latency is None else latency
+        if latency > 0:
+            await asyncio.sleep(latency)
+        else:
+            await asyncio.sleep(0)
+
+def build_guild(name, api, members=50, filler_roles=20, filler_channels=30, verified_ratio=0.9, staff=3):
+    guild = FakeGuild(name, api)
+    for i in range(filler_roles):
+        guild._add_role(f"Role {i}")
+    staff_role = guild._add_role("Staff")
+    verified_role = guild._add_role("Verified")
+    members_role = guild._add_role("members")
+
+    guild.me = FakeMember(guild, "bot", bot=True)
+    for i in range(filler_channels):
+        guild.add_text_channel(f"channel-{i}")
+    guild.general = guild.add_text_channel("general")
+
+    for i in range(members):
+        roles = [members_role]
+        if i < members * verified_ratio:
+            roles.append(verified_role)
+        if i < staff:
+            roles.append(staff_role)
+        guild.members.append(FakeMember(guild, f"member {i}", roles))
+    return guild
+
+# ---------------------------------------------------------------------------
+# PostgreSQL
+# ---------------------------------------------------------------------------
+
+class FakeDatabase:
+    """Dict-backed stand-in for the handful of statements DatabaseManager issues.
+
+    Every statement sleeps ``latency`` seconds (on whichever thread runs it, so
+    inline queries block the event loop just like real ones) and is counted.
+    Unknown SQL raises so the harness notices when DatabaseManager changes.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.connections = 0
+        self.roblox_users = {}
+        self.tickets = {}
+        self.listeners = []  # connections that ran LISTEN
+        self._ticket_ids = itertools.count(1)
+
+    def connect(self, dsn=None, **kwargs):
+        with self.lock:
+            self.connections += 1
+        return FakeConnection(self)
+
+    def execute(self, sql, params):
+        with self.lock:
+            self.queries += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        sql = " ".join(sql.split())
+        with self.lock:
+            for pattern, handler in _HANDLERS:
+                match = pattern.search(sql)
+                if match:
+                    return handler(self, params or (), match)
+        raise NotImplementedError(f"FakeDatabase does not understand: {sql}")
+
+class _Written(list):
+    """Handler result for statements whose cursor.rowcount isn't the number of rows returned"""
+    def __init__(self, rowcount):
+        super().__init__()
+        self.rowcount = rowcount
+
+def _select_one(db, params, match):
+    return [(1,)]
+
+def _schema_exists(db, params, match):
+    return [(True,)]
+
+def _schema_version(db, params, match):
+    from models import MIGRATIONS
+    return [(MIGRATIONS[-1][0],)]
+
+def _upsert_username(db, params, match):
+    db.roblox_users[params[0]] = params[1]
+    return []
+
+def _get_username(db, params, match):
+    username = db.roblox_users.get(params[0])
+    return [{'roblox_username': username}] if username is not None else []
+
+def _insert_ticket(db, params, match):
+    discord_user_id, channel_id, state = params[:3]
+    if channel_id in db.tickets:
+        # ON CONFLICT (channel_id) DO NOTHING
+        return _Written(0)
+    db.tickets[channel_id] = {
+        'id': next(db._ticket_ids),
+        'discord_user_id': discord_user_id,
+        'channel_id': channel_id,
+        'conversation_state': state,
+        'is_reporting_member': None,
+        'closed_at': None,
+    }
+    return _Written(1)
+
+def _update_ticket(db, params, match):
+    assignments = [a.strip() for a in match.group(1).split(",")]
+    row = db.tickets.get(params[-1])
+    values = iter(params)
+    for assignment in assignments:
+        column, _, value = (part.strip() for part in assignment.partition("="))
+        new_value = next(values) if value == "%s" else None
+        if row is not None and value == "%s":
+            row[column] = new_value
+    return []
+
+def _transition_ticket(db, params, match):
+    to_state, is_reporting_member, channel_id, from_state, _ = params
+    row = db.tickets.get(channel_id)
+    if row is None or row['conversation_state'] != from_state:
+        return [(False, row is not None)]
+    row['conversation_state'] = to_state
+    if is_reporting_member is not None:
+        row['is_reporting_member'] = is_reporting_member
+    return [(True, True)]
+
+def _notify(db, params, match):
+    channel, payloads = params
+    # Real NOTIFYs wait for the commit; delivering straight away is close enough here
+    for conn in db.listeners:
+        for payload in payloads:
+            conn._deliver(channel, payload)
+    return [(None,) for _ in payloads]
+
+def _get_ticket(db, params, match):
+    row = db.tickets.get(params[0])
+    return [dict(row)] if row else []
+
+def _load_tickets(db, params, match):
+    return [dict(row) for row in db.tickets.values() if row['closed_at'] is None]
+
+_HANDLERS = [
+    (re.compile(r"^SELECT 1$"), _select_one),
+    (re.compile(r"^SELECT to_regclass\('schema_version'\)"), _schema_exists),
+    (re.compile(r"^SELECT COALESCE\(MAX\(version\), 0\) FROM schema_version"), _schema_version),
+    (re.compile(r"^INSERT INTO roblox_users"), _upsert_username),
+    (re.compile(r"^SELECT roblox_username FROM roblox_users WHERE discord_user_id = %s"), _get_username),
+    (re.compile(r"^INSERT INTO ticket_conversations"), _insert_ticket),
+    (re.compile(r"^WITH moved AS \( UPDATE ticket_conversations SET .* WHERE channel_id = %s AND conversation_state = %s RETURNING id \)"), _transition_ticket),
+    (re.compile(r"^UPDATE ticket_conversations SET (.*) WHERE channel_id = %s$"), _update_ticket),
+    (re.compile(r"^SELECT \* FROM ticket_conversations WHERE channel_id = %s"), _get_ticket),
+    (re.compile(r"^SELECT DISTINCT ON \(channel_id\)"), _load_tickets),
+    (re.compile(r"^SELECT pg_notify\(%s, payload\)"), _notify),
+]
+
+class FakeNotify:
+    def __init__(self, channel, payload):
+        self.channel = channel
+        self.payload = payload
+        self.pid = 0
+
+class FakeCursor:
+    def __init__(self, db, dict_rows, conn=None):
+        self._db = db
+        self._conn = conn
+        self._dict_rows = dict_rows
+        self._rows = []
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if sql.startswith("LISTEN "):
+            with self._db.lock:
+                self._db.listeners.append(self._conn)
+            return
+        rows = self._db.execute(sql, params)
+        self.rowcount = getattr(rows, 'rowcount', len(rows))
+        if not self._dict_rows:
+            rows = [tuple(r.values()) if isinstance(r, dict) else r for r in rows]
+        self._rows = list(rows)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+class FakeConnection:
+    def __init__(self, db):
+        self._db = db
+        self.closed = 0
+        self.autocommit = False
+        self.notifies = []
+        self._pending = []
+        self._wakeup = None
+
+    def cursor(self, cursor_factory=None, name=None):
+        return FakeCursor(self._db, dict_rows=cursor_factory is not None, conn=self)
+
+    def fileno(self):
+        # A socket pair stands in for the server connection so select() works on LISTEN connections
+        if self._wakeup is None:
+            self._wakeup = socket.socketpair()
+        return self._wakeup[0].fileno()
+
+    def _deliver(self, channel, payload):
+        self._pending.append(FakeNotify(channel, payload))
+        self.fileno()
+        self._wakeup[1].send(b"\0")
+
+    def poll(self):
+        if self._wakeup is not None:
+            self._wakeup[0].setblocking(False)
+            try:
+                self._wakeup[0].recv(4096)
+            except BlockingIOError:
+                pass
+        while self._pending:
+            self.notifies.append(self._pending.pop(0))
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+        if self in self._db.listeners:
+            self._db.listeners.remove(self)
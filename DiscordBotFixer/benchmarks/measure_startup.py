@@ -0,0 +1,68 @@
+"""Time-to-ready and memory of the real bot with the lean member cache off and on.
+
+Starts bot.py (or bot_safe.py) against the real Discord gateway once per mode,
+waits for its "Ready in ..." line, lets it settle and then reads the process's
+resident memory. Needs a working DISCORD_TOKEN and DATABASE_URL in the
+environment or .env; the numbers only mean something for a bot that is in the
+large guilds you care about.
+
+Run from DiscordBotFixer/:
+
+    python benchmarks/measure_startup.py --runs 3
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+READY = re.compile(r"Ready in ([\d.]+)s, RSS (\d+) MB, (\d+) cached members")
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def measure(script, lean, settle, timeout):
+    env = dict(os.environ, LEAN_MEMBER_CACHE="true" if lean else "false", METRICS_PORT="0", PYTHONUNBUFFERED="1")
+    process = subprocess.Popen(
+        [sys.executable, script], cwd=os.path.join(HERE, ".."), env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    deadline = time.monotonic() + timeout
+    try:
+        for line in process.stdout:
+            match = READY.search(line)
+            if match:
+                time.sleep(settle)
+                return float(match.group(1)), int(match.group(2)), rss_mb(process.pid), int(match.group(3))
+            if time.monotonic() > deadline:
+                break
+        raise RuntimeError(f"{script} did not become ready within {timeout}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bot", default="bot.py", choices=("bot.py", "bot_safe.py"))
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--settle", type=float, default=30.0, help="seconds to wait after ready before reading RSS")
+    parser.add_argument("--timeout", type=float, default=900.0)
+    args = parser.parse_args()
+
+    print(f"{'mode':<6} {'run':>3} {'ready s':>8} {'RSS@ready MB':>13} {'RSS settled MB':>15} {'members':>9}")
+    for lean in (False, True):
+        for run in range(1, args.runs + 1):
+            ready, rss_at_ready, rss_settled, cached = measure(args.bot, lean, args.settle, args.timeout)
+            print(f"{'lean' if lean else 'full':<6} {run:>3} {ready:>8.1f} {rss_at_ready:>13} {rss_settled:>15.0f} {cached:>9}")
+
+if __name__ == "__main__":
+    main()
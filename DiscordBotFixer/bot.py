@@ -1,11 +1,27 @@
 import os
+import time
 import asyncio
 import discord
-import re
-from discord.ext import commands
 from discord.utils import get
 from dotenv import load_dotenv
-from models import DatabaseManager
+from models import DatabaseManager, AsyncDatabaseManager
+from metrics import (LoopLagMonitor, MetricsServer, registry, instrument, instrument_http, format_histogram, process_rss_bytes,
+                     HANDLER_LATENCY, DB_QUERY_LATENCY, API_REQUESTS, API_RATE_LIMITS)
+from tickets import TicketStateStore, OpenTicketIndex, TICKET_PREFIX, PENDING
+from intent import classify_response, YES, NO
+from phrases import PhraseRegistry, DEFAULT_EMERGENCY_PHRASES, normalize
+from roles import RoleIndex, STAFF_ROLE, VERIFIED_ROLE, MEMBERS_ROLE
+from alerts import EmergencyAlerter, LOOKING_UP
+from cache import MISSING
+from outbound import SendScheduler, PRIORITY_EMERGENCY, PRIORITY_TICKET
+from command_sync import CommandSyncer
+from sharding import make_bot, owns_shard_zero, shard_health, shard_config, ShardBusClient
+from members import MemberResolver
+from transcripts import TranscriptArchiver
+from maintenance import TicketSweeper
+from channel_pool import TicketChannelPool
+
+STARTED_AT = time.monotonic()
 
 # Load environment variables
 load_dotenv()
@@ -14,7 +30,49 @@ if not TOKEN:
     raise Exception("DISCORD_TOKEN not found. Please set DISCORD_TOKEN in your .env file.")
 
 # Initialize database
-db = DatabaseManager()
+# Queries run on a bounded worker pool so they never block the event loop.
+# Set DB_ASYNC=false to run them inline again (e.g. to compare loop lag).
+db = AsyncDatabaseManager(DatabaseManager(), inline=os.getenv('DB_ASYNC', 'true').lower() == 'false')
+
+# Ticket conversation state lives in memory and is written back in the background
+tickets = TicketStateStore(db)
+
+# Open ticket channel per (guild, user), for O(1) duplicate checks in /ticket
+open_tickets = OpenTicketIndex()
+
+# Emergency phrase matchers, built once per guild (EMERGENCY_PHRASES is comma-separated).
+# Guilds can override the list with /emergency_phrases; overrides live in bot_metadata.
+emergency_phrases = PhraseRegistry(
+    [p.strip() for p in os.getenv('EMERGENCY_PHRASES', '').split(',') if p.strip()] or DEFAULT_EMERGENCY_PHRASES
+)
+PHRASES_KEY_PREFIX = "emergency_phrases:"
+
+async def load_guild_phrases():
+    try:
+        overrides = await db.metadata_with_prefix(PHRASES_KEY_PREFIX)
+    except Exception as e:
+        print(f"Error loading emergency phrases: {e}")
+        return
+    for guild in bot.guilds:
+        value = overrides.get(f"{PHRASES_KEY_PREFIX}{guild.id}")
+        if value is None:
+            emergency_phrases.clear_phrases(guild.id)
+        else:
+            emergency_phrases.set_phrases(guild.id, value.splitlines())
+
+async def reload_guild_phrases(guild_id):
+    try:
+        value = await db.get_metadata(f"{PHRASES_KEY_PREFIX}{guild_id}")
+    except Exception as e:
+        print(f"Error loading emergency phrases for guild {guild_id}: {e}")
+        return
+    if value is None:
+        emergency_phrases.clear_phrases(guild_id)
+    else:
+        emergency_phrases.set_phrases(guild_id, value.splitlines())
+
+# Track how long the event loop is blocked
+loop_monitor = LoopLagMonitor(warn_threshold=float(os.getenv('LOOP_LAG_WARN_MS', '250')) / 1000)
 
 # Bot setup
 intents = discord.Intents.default()
@@ -22,75 +80,383 @@ intents.members = True
 intents.message_content = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# LEAN_MEMBER_CACHE=true skips chunking every guild at startup and keeps no member cache;
+# role checks use the member from the event payload or a small fetched-on-demand cache instead
+LEAN_MEMBER_CACHE = os.getenv('LEAN_MEMBER_CACHE', 'false').lower() == 'true'
+member_options = {}
+if LEAN_MEMBER_CACHE:
+    member_options = dict(chunk_guilds_at_startup=False, member_cache_flags=discord.MemberCacheFlags.none())
+members = MemberResolver(
+    maxsize=int(os.getenv('MEMBER_CACHE_SIZE', '5000')),
+    ttl=float(os.getenv('MEMBER_CACHE_TTL', '60')),
+)
+time_to_ready = None
+
+# SHARDED=true runs an AutoShardedBot; launcher.py sets SHARD_COUNT/SHARD_IDS per worker process
+bot = make_bot(intents, command_prefix="!", **member_options)
+
+def on_shard_bus_message(kind, payload):
+    """Another worker changed shared state; drop our cached copy (runs on the bus thread)"""
+    if kind == 'invalidate' and payload['kind'] == 'username':
+        db.db.username_cache.invalidate(payload['key'])
+
+# Only present when running under launcher.py
+shard_bus = ShardBusClient.from_env(on_shard_bus_message)
+# Database change notifications already reach every process, workers included
+if shard_bus and not db.db.notify_changes:
+    db.db.change_listeners.append(lambda kind, key: shard_bus.publish('invalidate', {'kind': kind, 'key': key}))
+health_task = None
+
+def on_database_change(kind, payload):
+    """Another process (bot.py, bot_safe.py, a replica or worker) committed a change; runs on the listener thread"""
+    if kind == 'username':
+        db.db.username_cache.invalidate(payload['key'])
+    elif kind in ('usernames_imported', 'resync'):
+        db.db.username_cache.clear()
+    if kind in ('ticket', 'ticket_closed', 'resync'):
+        bot.loop.call_soon_threadsafe(apply_ticket_change, kind, payload)
+    if kind == 'metadata' and payload['key'].startswith(PHRASES_KEY_PREFIX):
+        guild_id = int(payload['key'][len(PHRASES_KEY_PREFIX):])
+        bot.loop.call_soon_threadsafe(lambda: asyncio.create_task(reload_guild_phrases(guild_id)))
+    elif kind == 'resync':
+        bot.loop.call_soon_threadsafe(lambda: asyncio.create_task(load_guild_phrases()))
+
+def apply_ticket_change(kind, payload):
+    if kind == 'ticket':
+        tickets.apply_remote(payload.pop('key'), payload)
+    elif kind == 'ticket_closed':
+        tickets.forget(payload['key'])
+    else:
+        asyncio.create_task(tickets.reload())
+
+async def report_shard_health():
+    while True:
+        shard_bus.publish('health', {'shards': shard_health(bot), 'guilds': len(bot.guilds)})
+        await asyncio.sleep(15)
+
+# Slash commands are only re-uploaded when the tree changed (FORCE_COMMAND_SYNC=true overrides)
+command_syncer = CommandSyncer(bot, db)
+
+# Metrics: Prometheus text at http://METRICS_HOST:METRICS_PORT/metrics (METRICS_PORT=0 disables)
+instrument_http(bot)
+metrics_port = int(os.getenv('METRICS_PORT', '9108'))
+metrics_server = MetricsServer(os.getenv('METRICS_HOST', '127.0.0.1'), metrics_port) if metrics_port else None
+registry.gauge('bot_db_pool_connections', 'Pooled database connections by state',
+               lambda: {state: db.db.pool_stats()[state] for state in ('idle', 'in_use')}, labelname='state')
+registry.gauge('bot_db_pending_calls', 'Database calls queued or running on the worker pool', lambda: db.stats()['pending'])
+registry.gauge('bot_username_cache_lookups', 'Roblox username cache lookups by result',
+               lambda: {result: db.db.username_cache.stats()[result] for result in ('hits', 'misses')}, labelname='result')
+registry.gauge('bot_tickets_tracked', 'Ticket conversations held in memory', lambda: tickets.stats()['tickets'])
+registry.gauge('bot_tickets_pending_writes', 'Ticket state changes waiting to be persisted', lambda: tickets.stats()['pending_writes'])
+registry.gauge('bot_guilds', 'Guilds the bot is connected to', lambda: len(bot.guilds))
+registry.gauge('bot_ticket_pool_channels', 'Pre-created ticket channels waiting to be claimed', lambda: len(ticket_pool))
+registry.gauge('bot_cached_members', 'Members held in the discord.py member cache', lambda: sum(len(g.members) for g in bot.guilds))
+registry.gauge('bot_process_rss_bytes', 'Resident memory of the bot process', process_rss_bytes)
+registry.gauge('bot_time_to_ready_seconds', 'Seconds from process start to the first on_ready', lambda: time_to_ready or 0.0)
+registry.gauge('bot_shard_latency_seconds', 'Gateway heartbeat latency per shard',
+               lambda: {shard_id: info['latency'] for shard_id, info in shard_health(bot).items()}, labelname='shard')
+registry.gauge('bot_shard_up', 'Whether each shard is connected (1) or not (0)',
+               lambda: {shard_id: int(info['up']) for shard_id, info in shard_health(bot).items()}, labelname='shard')
+
+# Ticket transcripts are archived to TRANSCRIPT_DIR as gzipped JSONL on /close
+archiver = TranscriptArchiver(os.getenv('TRANSCRIPT_DIR', 'transcripts'))
+
+# Hidden pre-created channels /ticket can claim instead of creating one (TICKET_POOL_SIZE=0 disables)
+ticket_pool = TicketChannelPool(
+    bot,
+    size=int(os.getenv('TICKET_POOL_SIZE', '0')),
+    refill_interval=float(os.getenv('TICKET_POOL_REFILL_SECONDS', '10')),
+)
+
+# Closes ticket rows whose channel is gone and archives (or deletes) old closed rows
+sweeper = TicketSweeper(
+    bot, db, tickets,
+    interval=float(os.getenv('TICKET_SWEEP_INTERVAL', '3600')),
+    retention_days=int(os.getenv('TICKET_RETENTION_DAYS', '90')),
+    batch_size=int(os.getenv('TICKET_SWEEP_BATCH', '500')),
+    archive=os.getenv('TICKET_RETENTION_MODE', 'archive').lower() != 'delete',
+    # Under launcher.py this worker only sees its own shards' channels
+    full_view=shard_config()[1] is None,
+)
 
-def get_role_ci(guild, target_name):
-    """Get role by case-insensitive name matching"""
-    for role in guild.roles:
-        if role.name.lower() == target_name.lower():
-            return role
-    return None
+# Casefolded role name -> role ID per guild, kept current by the role events below
+role_index = RoleIndex()
 
-def is_verified(member):
+def get_role_ci(guild, role_key):
+    """Get role by case-insensitive name (one of the *_ROLE keys)"""
+    return role_index.get_role(guild, role_key)
+
+def render_emergency_alert(guild, entries):
+    """Alert text for (mention, roblox_username) entries, one or many users in a burst"""
+    lines = ["🚨 **EMERGENCY DETECTED** 🚨"]
+    known = [(mention, username) for mention, username in entries if username and username is not LOOKING_UP]
+    unknown = [mention for mention, username in entries if not username]
+    pending = [mention for mention, username in entries if username is LOOKING_UP]
+    
+    if pending:
+        # Sent before the Roblox username is known: ping everyone who might respond; the /snipe line is edited in
+        members_role = get_role_ci(guild, MEMBERS_ROLE)
+        staff_role = get_role_ci(guild, STAFF_ROLE)
+        mentions = " ".join(role.mention for role in (members_role, staff_role) if role) or "@here"
+        lines.append(f"{mentions} Emergency assistance needed for {', '.join(pending)}! (looking up Roblox username...)")
+    
+    if known:
+        # Send /snipe command with bloxiana and target
+        lines.extend(f"/snipe bloxiana baddies {username}" for _, username in known)
+        members_role = get_role_ci(guild, MEMBERS_ROLE)
+        # Fallback to @here if members role not found
+        members_mention = members_role.mention if members_role else "@here"
+        lines.append(f"{members_mention} Emergency assistance needed for {', '.join(m for m, _ in known)}!")
+    
+    if unknown:
+        # Fallback if no Roblox username found
+        staff_role = get_role_ci(guild, STAFF_ROLE)
+        staff_mention = staff_role.mention if staff_role else "@here"
+        verb = "needs" if len(unknown) == 1 else "need"
+        lines.append(f"{staff_mention} {', '.join(unknown)} {verb} immediate assistance!")
+    
+    return "\n".join(lines)
+
+# All channel messages go through one prioritized, per-channel rate-limited queue
+outbound = SendScheduler(
+    workers=int(os.getenv('OUTBOUND_WORKERS', '4')),
+    batch_threshold=int(os.getenv('OUTBOUND_BATCH_THRESHOLD', '50')),
+)
+
+# One alert per channel per burst of emergency messages; repeats edit it in place
+alerter = EmergencyAlerter(
+    render_emergency_alert,
+    send=lambda channel, content: outbound.send(channel, content, PRIORITY_EMERGENCY),
+    window=float(os.getenv('EMERGENCY_WINDOW', '30')),
+    burst=int(os.getenv('EMERGENCY_BURST', '3')),
+    refill_per_second=1 / float(os.getenv('EMERGENCY_REFILL_SECONDS', '20')),
+    lookup_timeout=float(os.getenv('EMERGENCY_LOOKUP_TIMEOUT', '1.0')),
+)
+
+async def is_verified(member, guild=None):
     """Check if member has Verified role (case insensitive)"""
-    return any(role.name.lower() == "verified" for role in member.roles)
+    return await member_has_role(member, VERIFIED_ROLE, guild)
 
-def is_staff(member):
+async def is_staff(member, guild=None):
     """Check if member has Staff role (case insensitive)"""
-    return any(role.name.lower() == "staff" for role in member.roles)
-
-def is_yes_response(text):
-    """Detect if response indicates 'yes'"""
-    text = text.lower().strip()
-    yes_patterns = [
-        r'^yes$', r'^y$', r'^yeah$', r'^yep$', r'^yup$', r'^sure$', r'^ok$', r'^okay$',
-        r'^definitely$', r'^absolutely$', r'^correct$', r'^right$', r'^true$',
-        r'yes\b', r'\byes\b', r'yeah\b', r'\byeah\b'
-    ]
-    return any(re.search(pattern, text) for pattern in yes_patterns)
-
-def is_no_response(text):
-    """Detect if response indicates 'no'"""
-    text = text.lower().strip()
-    no_patterns = [
-        r'^no$', r'^n$', r'^nope$', r'^nah$', r'^never$', r'^not$', r'^negative$',
-        r'^incorrect$', r'^wrong$', r'^false$',
-        r'no\b', r'\bno\b', r'nope\b', r'\bnope\b', r'not\b', r'\bnot\b'
-    ]
-    return any(re.search(pattern, text) for pattern in no_patterns)
+    return await member_has_role(member, STAFF_ROLE, guild)
+
+async def member_has_role(member, role_key, guild=None):
+    guild = guild or getattr(member, 'guild', None)
+    if guild is None:
+        return False
+    member = await members.resolve(guild, member)
+    return member is not None and role_index.member_has(member, role_key)
 
 @bot.event
 async def on_ready():
-    await bot.tree.sync()
+    global health_task, time_to_ready
+    loop_monitor.start()
+    if shard_bus:
+        shard_bus.start()
+        if health_task is None or health_task.done():
+            health_task = asyncio.create_task(report_shard_health())
+    outbound.start()
+    if metrics_server:
+        try:
+            await metrics_server.start()
+        except OSError as e:
+            print(f"Error starting metrics server: {e}")
+    # Role changes may have been missed while disconnected
+    for guild in bot.guilds:
+        role_index.rebuild(guild)
+    # Listen before hydrating so changes committed meanwhile aren't missed
+    listener = db.db.listen_for_changes(on_database_change)
+    if listener and not await asyncio.to_thread(listener.wait_until_listening, 10):
+        print("⚠️ Database change listener not connected yet; caches will be reloaded once it is")
+    await tickets.start()
+    await load_guild_phrases()
+    for guild in bot.guilds:
+        open_tickets.rebuild(guild, tickets)
+        ticket_pool.rebuild(guild)
+    ticket_pool.start()
+    # Commands are global, so only the worker running shard 0 syncs them
+    if owns_shard_zero(bot):
+        await command_syncer.sync(force=os.getenv('FORCE_COMMAND_SYNC', 'false').lower() == 'true')
+        sweeper.start()
     print(f"✅ Logged in as {bot.user}")
     print(f"Bot is ready and connected to {len(bot.guilds)} servers")
+    if time_to_ready is None:
+        time_to_ready = time.monotonic() - STARTED_AT
+        print(f"⏱️ Ready in {time_to_ready:.1f}s, RSS {process_rss_bytes() / 2**20:.0f} MB, "
+              f"{sum(len(g.members) for g in bot.guilds)} cached members (lean member cache: {'on' if LEAN_MEMBER_CACHE else 'off'})")
+
+@bot.event
+async def on_shard_ready(shard_id):
+    print(f"✅ Shard {shard_id} ready")
+
+@bot.event
+async def on_shard_disconnect(shard_id):
+    print(f"⚠️ Shard {shard_id} disconnected")
+
+@bot.event
+async def on_shard_resumed(shard_id):
+    print(f"🔄 Shard {shard_id} resumed")
+
+@bot.event
+async def on_guild_join(guild):
+    role_index.rebuild(guild)
+    await reload_guild_phrases(guild.id)
+    open_tickets.rebuild(guild, tickets)
+    ticket_pool.rebuild(guild)
+
+@bot.event
+async def on_guild_remove(guild):
+    role_index.forget(guild)
+    emergency_phrases.clear_phrases(guild.id)
+    ticket_pool.forget(guild)
+
+@bot.event
+async def on_guild_role_create(role):
+    role_index.rebuild(role.guild)
+
+@bot.event
+async def on_guild_role_update(before, after):
+    if before.name != after.name:
+        role_index.rebuild(after.guild)
+
+@bot.event
+async def on_guild_role_delete(role):
+    role_index.rebuild(role.guild)
+
+@bot.event
+async def on_guild_channel_create(channel):
+    if isinstance(channel, discord.TextChannel):
+        open_tickets.track_channel(channel, tickets)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    open_tickets.remove_channel(channel.id)
+    tickets.forget(channel.id)
+    ticket_pool.discard(channel.id)
 
 @bot.tree.command(name="ping", description="Check the bot's latency")
 async def ping(interaction: discord.Interaction):
-    await interaction.response.send_message(f"Pong! 🏓 Latency: {round(bot.latency * 1000)}ms")
+    lag = loop_monitor.snapshot()
+    # Report the latency of the shard this guild is on
+    shard = bot.get_shard(interaction.guild.shard_id) if interaction.guild and hasattr(bot, 'get_shard') else None
+    latency = shard.latency if shard else bot.latency
+    await interaction.response.send_message(
+        f"Pong! 🏓 Latency: {round(latency * 1000)}ms | "
+        f"Loop lag p99: {lag['p99_ms']:.0f}ms, max: {lag['max_ms']:.0f}ms"
+    )
 
 @bot.tree.command(name="hello", description="Say hello")
 async def hello(interaction: discord.Interaction):
     await interaction.response.send_message(f"Hello {interaction.user.mention}! 👋")
 
+@bot.tree.command(name="sync_commands", description="Upload slash commands to Discord now (Admin only)")
+@discord.app_commands.default_permissions(administrator=True)
+async def sync_commands(interaction: discord.Interaction):
+    permissions = getattr(interaction.user, 'guild_permissions', None)
+    if not permissions or not permissions.administrator:
+        await interaction.response.send_message("❌ You must be an administrator to use this command.", ephemeral=True)
+        return
+    
+    await interaction.response.defer(ephemeral=True)
+    try:
+        count = await command_syncer.sync(force=True)
+        await interaction.followup.send(f"✅ Synced {count} commands.", ephemeral=True)
+    except Exception as e:
+        print(f"Error syncing commands: {e}")
+        await interaction.followup.send("❌ Command sync failed. Please try again later.", ephemeral=True)
+
+def change_feed_status():
+    listener = db.db.change_listener
+    if listener is None:
+        return "off" if not db.db.notify_changes else "not started"
+    return "listening" if listener.connected else "reconnecting"
+
+@bot.tree.command(name="stats", description="Show bot performance statistics (Staff only)")
+async def stats(interaction: discord.Interaction):
+    if not await is_staff(interaction.user, interaction.guild):
+        await interaction.response.send_message("❌ You must have the Staff role to use this command.", ephemeral=True)
+        return
+    
+    lag = loop_monitor.snapshot()
+    pool = db.db.pool_stats()
+    cache = db.db.username_cache.stats()
+    lines = ["**Handlers**", *(format_histogram(HANDLER_LATENCY) or ["No samples yet"]),
+             "**Database**", *(format_histogram(DB_QUERY_LATENCY) or ["No samples yet"]),
+             f"Pool: {pool['in_use']} in use / {pool['size']} open (max {pool['max_size']}), "
+             f"{pool['waits']} waits, {pool['timeouts']} timeouts",
+             f"Username cache: {cache['size']} entries, {cache['hit_rate']:.0%} hit rate",
+             f"Change feed: {change_feed_status()}",
+             f"Member cache: {sum(len(g.members) for g in bot.guilds)} cached by discord.py, "
+             f"{members.stats()['size']} resolved, {members.stats()['fetches']} fetched",
+             f"Tickets: {tickets.stats()['tickets']} tracked, {tickets.stats()['pending_writes']} writes pending",
+             f"Outbound queue: {outbound.depth()} messages waiting",
+             f"Last ticket sweep: {sweeper.summary()}",
+             "**Discord API**",
+             f"{API_REQUESTS.total()} requests, {API_RATE_LIMITS.total()} rate limited (429)",
+             f"Gateway latency: {round(bot.latency * 1000)}ms",
+             *(f"Shard {shard_id}: {'up' if info['up'] else 'DOWN'}, {info['latency'] * 1000:.0f}ms"
+               for shard_id, info in sorted(shard_health(bot).items())),
+             "**Event loop**",
+             f"Lag p50 {lag['p50_ms']:.1f}ms, p99 {lag['p99_ms']:.1f}ms, max {lag['max_ms']:.1f}ms"]
+    await interaction.response.send_message("\n".join(lines)[:2000], ephemeral=True)
+
+@bot.tree.command(name="emergency_phrases", description="Show or change this server's emergency phrases (Staff only)")
+@discord.app_commands.describe(
+    add="Comma-separated phrases to add",
+    remove="Comma-separated phrases to remove",
+    reset="Go back to the default phrase list"
+)
+async def emergency_phrases_command(interaction: discord.Interaction, add: str = None, remove: str = None, reset: bool = False):
+    guild = interaction.guild
+    if not guild or not await is_staff(interaction.user, guild):
+        await interaction.response.send_message("❌ You must have the Staff role to use this command.", ephemeral=True)
+        return
+    
+    key = f"{PHRASES_KEY_PREFIX}{guild.id}"
+    if reset or add or remove:
+        phrases = [] if reset else list(emergency_phrases.phrases(guild.id))
+        if add:
+            phrases.extend(p.strip() for p in add.split(',') if p.strip())
+        if remove:
+            removed = {normalize(p) for p in remove.split(',') if p.strip()}
+            phrases = [p for p in phrases if normalize(p) not in removed]
+        try:
+            if reset:
+                await db.delete_metadata(key)
+                emergency_phrases.clear_phrases(guild.id)
+            else:
+                await db.set_metadata(key, "\n".join(phrases))
+                emergency_phrases.set_phrases(guild.id, phrases)
+        except Exception as e:
+            print(f"Error saving emergency phrases: {e}")
+            await interaction.response.send_message("❌ There was an error saving the phrases. Please try again later.", ephemeral=True)
+            return
+    
+    phrases = emergency_phrases.phrases(guild.id)
+    listing = ", ".join(f"`{p}`" for p in phrases) or "none"
+    await interaction.response.send_message(f"🚨 {len(phrases)} emergency phrases: {listing}"[:2000], ephemeral=True)
+
 @bot.tree.command(name="roblox_verify", description="Verify your Roblox username")
 @discord.app_commands.describe(roblox_username="Your Roblox username")
+@instrument("roblox_verify")
 async def roblox_verify(interaction: discord.Interaction, roblox_username: str):
     member = interaction.user
     
-    if not is_verified(member):
+    if not await is_verified(member, interaction.guild):
         await interaction.response.send_message("❌ You must have the Verified role to use this command.", ephemeral=True)
         return
     
     try:
         # Save to database
-        db.save_roblox_username(member.id, roblox_username)
+        await db.save_roblox_username(member.id, roblox_username)
         await interaction.response.send_message(f"✅ Your Roblox username `{roblox_username}` has been saved to the database, {member.mention}!", ephemeral=True)
     except Exception as e:
         print(f"Error saving Roblox username: {e}")
         await interaction.response.send_message("❌ There was an error saving your username. Please try again later.", ephemeral=True)
 
 @bot.tree.command(name="ticket", description="Create a private ticket channel for support")
+@instrument("ticket")
 async def ticket(interaction: discord.Interaction):
     member = interaction.user
     guild = interaction.guild
@@ -99,11 +465,27 @@ async def ticket(interaction: discord.Interaction):
         await interaction.response.send_message("This command can only be used in a server.", ephemeral=True)
         return
     
-    if not is_verified(member):
+    if not await is_verified(member, guild):
         await interaction.response.send_message("❌ You must have the Verified role to use this command.", ephemeral=True)
         return
     
-    staff_role = get_role_ci(guild, "Staff")
+    # Reserve the slot before any await so concurrent invocations can't both create a channel
+    existing = open_tickets.claim(guild.id, member.id)
+    if existing is PENDING:
+        await interaction.response.send_message("Your ticket is already being created, please wait a moment.", ephemeral=True)
+        return
+    if existing is not None:
+        await interaction.response.send_message(f"You already have an open ticket: <#{existing}>", ephemeral=True)
+        return
+    
+    # Acknowledge right away; channel creation alone can take longer than Discord's 3 second deadline
+    try:
+        await interaction.response.defer(ephemeral=True, thinking=True)
+    except Exception:
+        open_tickets.release(guild.id, member.id)
+        raise
+    
+    staff_role = get_role_ci(guild, STAFF_ROLE)
     overwrites = {
         guild.default_role: discord.PermissionOverwrite(read_messages=False),
         member: discord.PermissionOverwrite(read_messages=True, send_messages=True),
@@ -112,35 +494,46 @@ async def ticket(interaction: discord.Interaction):
     if staff_role:
         overwrites[staff_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
     
-    channel_name = f"ticket-{member.name}".lower().replace(" ", "-")
-    existing = discord.utils.get(guild.text_channels, name=channel_name)
+    channel_name = f"{TICKET_PREFIX}{member.name}".lower().replace(" ", "-")
+    topic = f"Support ticket for {member.display_name}"
     
-    if existing:
-        await interaction.response.send_message(f"You already have an open ticket: {existing.mention}", ephemeral=True)
-        return
+    # A pre-created channel only needs renaming and its overwrites set; otherwise create one
+    ticket_channel = ticket_pool.claim(guild)
+    if ticket_channel is not None:
+        try:
+            await ticket_channel.edit(name=channel_name, overwrites=overwrites, topic=topic)
+        except Exception as e:
+            print(f"Error claiming pooled ticket channel: {e}")
+            ticket_channel = None
     
-    ticket_channel = await guild.create_text_channel(
-        channel_name,
-        overwrites=overwrites,
-        topic=f"Support ticket for {member.display_name}"
-    )
+    if ticket_channel is None:
+        try:
+            ticket_channel = await guild.create_text_channel(channel_name, overwrites=overwrites, topic=topic)
+        except Exception as e:
+            open_tickets.release(guild.id, member.id)
+            print(f"Error creating ticket channel: {e}")
+            await interaction.followup.send("❌ There was an error creating your ticket. Please try again later.", ephemeral=True)
+            return
+    open_tickets.add(guild.id, member.id, ticket_channel.id)
     
-    # Save ticket conversation to database
-    try:
-        db.save_ticket_conversation(member.id, ticket_channel.id, 'started')
-    except Exception as e:
-        print(f"Error saving ticket conversation: {e}")
+    # Track the conversation in memory; the database row is written in the background
+    tickets.open(member.id, ticket_channel.id, 'started')
     
-    # Send initial bot message in ticket channel
-    await ticket_channel.send(
+    # Post the welcome message and hand the user their channel link at the same time
+    welcome = outbound.send(
+        ticket_channel,
         f"{member.mention} Thank you for opening a ticket! 🎫\n\n"
         f"I need to ask you a quick question first:\n"
-        f"**Are you here to report a Member/Allie?** (Please respond with yes or no)"
+        f"**Are you here to report a Member/Allie?** (Please respond with yes or no)",
+        PRIORITY_TICKET
+    )
+    await asyncio.gather(
+        welcome,
+        interaction.followup.send(f"Your ticket has been created: {ticket_channel.mention}", ephemeral=True),
     )
-    
-    await interaction.response.send_message(f"Your ticket has been created: {ticket_channel.mention}", ephemeral=True)
 
 @bot.tree.command(name="close", description="Close the current ticket channel (Staff only)")
+@instrument("close")
 async def close(interaction: discord.Interaction):
     member = interaction.user
     guild = interaction.guild
@@ -149,19 +542,32 @@ async def close(interaction: discord.Interaction):
         await interaction.response.send_message("This command can only be used in a server.", ephemeral=True)
         return
     
-    if not is_staff(member):
+    if not await is_staff(member, guild):
         await interaction.response.send_message("❌ You must have the Staff role to use this command.", ephemeral=True)
         return
     
     channel = interaction.channel
-    if channel and channel.name.startswith("ticket-"):
-        await interaction.response.send_message("Closing ticket in 5 seconds...")
-        await asyncio.sleep(5)
-        await channel.delete()
-    else:
+    if not channel or not channel.name.startswith(TICKET_PREFIX):
         await interaction.response.send_message("This command can only be used in ticket channels.", ephemeral=True)
+        return
+    
+    await interaction.response.send_message("Saving transcript...")
+    # The transcript and closed_at must be stored before the channel (and its history) is gone
+    try:
+        path, count = await archiver.archive(channel)
+        if not await tickets.close(channel.id, path):
+            print(f"No ticket row for channel {channel.id}; transcript saved to {path}")
+    except Exception as e:
+        print(f"Error archiving ticket {channel.id}: {e}")
+        await interaction.followup.send("❌ Couldn't save the transcript, so the ticket was left open. Please try again later.")
+        return
+    
+    await interaction.followup.send(f"Transcript saved ({count} messages). Closing ticket in 5 seconds...")
+    await asyncio.sleep(5)
+    await channel.delete()
 
 @bot.event
+@instrument("on_message")
 async def on_message(message):
     # Ignore bot messages
     if message.author.bot:
@@ -172,70 +578,48 @@ async def on_message(message):
         return
     
     # Emergency detection system
-    content = message.content.lower()
-    emergency_phrases = ["getting jumped", "need help"]
-    
-    if any(phrase in content for phrase in emergency_phrases):
-        # Get the user's Roblox username from database
+    if emergency_phrases.matcher(guild.id).search(message.content):
+        # Alert first: a cached username goes straight in, otherwise the
+        # database lookup runs alongside the send and the /snipe line is edited in
+        roblox_username = db.cached_roblox_username(message.author.id)
         try:
-            roblox_username = db.get_roblox_username(message.author.id)
-            if roblox_username:
-                # Send /snipe command with bloxiana and target
-                members_role = get_role_ci(guild, "members")
-                if members_role:
-                    members_mention = members_role.mention
-                else:
-                    # Fallback to @here if members role not found
-                    members_mention = "@here"
-                
-                await message.channel.send(
-                    f"🚨 **EMERGENCY DETECTED** 🚨\n"
-                    f"/snipe bloxiana baddies {roblox_username}\n"
-                    f"{members_mention} Emergency assistance needed for {message.author.mention}!"
-                )
+            if roblox_username is not MISSING:
+                await alerter.trigger(message.channel, message.author, roblox_username)
             else:
-                # Fallback if no Roblox username found
-                staff_role = get_role_ci(guild, "Staff")
-                staff_mention = staff_role.mention if staff_role else "@here"
-                await message.channel.send(
-                    f"🚨 **EMERGENCY DETECTED** 🚨\n"
-                    f"{staff_mention} {message.author.mention} needs immediate assistance!"
-                )
+                await alerter.trigger(message.channel, message.author, lookup=db.load_roblox_username(message.author.id))
         except Exception as e:
-            print(f"Error in emergency detection: {e}")
-            # Fallback emergency response
-            staff_role = get_role_ci(guild, "Staff")
-            staff_mention = staff_role.mention if staff_role else "@here"
-            await message.channel.send(
-                f"🚨 **EMERGENCY DETECTED** 🚨\n"
-                f"{staff_mention} {message.author.mention} needs immediate assistance!"
-            )
+            print(f"Error sending emergency alert: {e}")
     
     # Ticket conversation handling
-    if message.channel.name.startswith("ticket-"):
+    if message.channel.name.startswith(TICKET_PREFIX):
         try:
-            ticket_data = db.get_ticket_conversation(message.channel.id)
+            ticket_data = await tickets.get(message.channel.id)
             if ticket_data and ticket_data['conversation_state'] == 'started':
                 # Check if this is a response to the member/allie question
-                if is_yes_response(message.content):
-                    # User is reporting a member/allie
-                    db.update_ticket_conversation(message.channel.id, 'reporting_member', True)
-                    staff_role = get_role_ci(guild, "Staff")
-                    staff_mention = staff_role.mention if staff_role else "@here"
-                    
-                    await message.channel.send(
-                        f"Ok a {staff_mention} member is otw, in the meantime Type what happened and send proof."
-                    )
+                intent = classify_response(message.content)
+                if intent == YES:
+                    # User is reporting a member/allie (False if another reply already moved the ticket on, here or in the database)
+                    if await tickets.transition(message.channel.id, 'reporting_member', True):
+                        staff_role = get_role_ci(guild, STAFF_ROLE)
+                        staff_mention = staff_role.mention if staff_role else "@here"
+                        
+                        await outbound.send(
+                            message.channel,
+                            f"Ok a {staff_mention} member is otw, in the meantime Type what happened and send proof.",
+                            PRIORITY_TICKET
+                        )
                     
-                elif is_no_response(message.content):
+                elif intent == NO:
                     # User is not reporting a member/allie
-                    db.update_ticket_conversation(message.channel.id, 'general_help', False)
-                    staff_role = get_role_ci(guild, "Staff")
-                    staff_mention = staff_role.mention if staff_role else "@here"
-                    
-                    await message.channel.send(
-                        f"Ok then {staff_mention} Help is otw"
-                    )
+                    if await tickets.transition(message.channel.id, 'general_help', False):
+                        staff_role = get_role_ci(guild, STAFF_ROLE)
+                        staff_mention = staff_role.mention if staff_role else "@here"
+                        
+                        await outbound.send(
+                            message.channel,
+                            f"Ok then {staff_mention} Help is otw",
+                            PRIORITY_TICKET
+                        )
                     
         except Exception as e:
             print(f"Error in ticket conversation handling: {e}")
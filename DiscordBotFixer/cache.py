@@ -0,0 +1,94 @@
+import time
+import threading
+from collections import OrderedDict
+
+MISSING = object()
+
+class TTLCache:
+    """Size-bounded LRU cache with per-entry expiry.
+
+    ``None`` values are cached as negative entries ("no mapping") with their own,
+    usually shorter, TTL. Safe to use from the event loop and from database
+    worker threads at the same time.
+    """
+
+    def __init__(self, maxsize=10000, ttl=3600.0, negative_ttl=300.0, clock=time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key, default=MISSING):
+        """Return the cached value (possibly ``None``) or ``default`` on a miss"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+    
+    def peek(self, key, default=MISSING):
+        """Like ``get`` but not counted as a hit or miss, for re-checks after a counted lookup"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > self._clock():
+                return entry[0]
+            return default
+    
+    def version(self):
+        """Token to pass to ``set`` when loading a value outside the cache"""
+        with self._lock:
+            return self._version
+    
+    def set(self, key, value, version=None):
+        """Store ``value``; skipped if anything was invalidated since ``version`` was taken"""
+        ttl = self.negative_ttl if value is None else self.ttl
+        with self._lock:
+            if version is not None and version != self._version:
+                # A write raced with this load; caching the loaded value could resurrect stale data
+                return
+            if ttl <= 0:
+                return
+            self._data[key] = (value, self._clock() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key):
+        with self._lock:
+            self._version += 1
+            self._data.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._data.clear()
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
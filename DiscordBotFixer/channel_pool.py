@@ -0,0 +1,112 @@
+import asyncio
+import secrets
+import discord
+from collections import deque
+from metrics import registry
+
+# Pooled channels are recognised by name, so the pool survives restarts
+POOL_PREFIX = "pooled-ticket-"
+
+TICKET_POOL_CLAIMS = registry.counter(
+    'bot_ticket_pool_claims_total', 'Ticket channel pool claims by result', ('result',))
+
+class TicketChannelPool:
+    """Hidden, pre-created ticket channels per guild.
+    
+    /ticket claims one and only has to rename it and apply the ticket's
+    overwrites (a single channel edit), instead of waiting on a channel
+    create, which is slower and counts against a tight per-guild limit. One
+    background task keeps every guild topped up to ``size``, creating at most
+    one channel every ``refill_interval`` seconds across all guilds, so
+    refilling never competes hard with real traffic. ``size=0`` disables it.
+    """
+    
+    def __init__(self, bot, size=0, refill_interval=10.0):
+        self.bot = bot
+        self.size = size
+        self.refill_interval = refill_interval
+        self._channels = {}     # guild ID -> deque of pooled channel IDs
+        self._no_access = set() # guilds where the bot may not create channels
+        self._wakeup = None
+        self._task = None
+    
+    def start(self):
+        if self.size <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._refill())
+        self._wakeup.set()
+    
+    def rebuild(self, guild):
+        """Pick up pooled channels left over from a previous run"""
+        self._channels[guild.id] = deque(c.id for c in guild.text_channels if c.name.startswith(POOL_PREFIX))
+        self._no_access.discard(guild.id)
+        self._wake()
+    
+    def forget(self, guild):
+        self._channels.pop(guild.id, None)
+        self._no_access.discard(guild.id)
+    
+    def discard(self, channel_id):
+        for pool in self._channels.values():
+            if channel_id in pool:
+                pool.remove(channel_id)
+                self._wake()
+                return
+    
+    def claim(self, guild):
+        """A pooled channel for ``guild`` (removed from the pool), or None if it's empty"""
+        if self.size <= 0:
+            return None
+        pool = self._channels.get(guild.id)
+        channel = None
+        while pool and channel is None:
+            channel = guild.get_channel(pool.popleft())
+        TICKET_POOL_CLAIMS.inc(result='hit' if channel is not None else 'miss')
+        self._wake()
+        return channel
+    
+    def __len__(self):
+        return sum(len(pool) for pool in self._channels.values())
+    
+    async def create(self, guild):
+        """Add one hidden channel to the guild's pool"""
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+        }
+        channel = await guild.create_text_channel(
+            f"{POOL_PREFIX}{secrets.token_hex(3)}",
+            overwrites=overwrites,
+            reason="Pre-created ticket channel"
+        )
+        self._channels.setdefault(guild.id, deque()).append(channel.id)
+        return channel
+    
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    def _next_guild(self):
+        for guild in self.bot.guilds:
+            if guild.id not in self._no_access and len(self._channels.get(guild.id, ())) < self.size:
+                return guild
+        return None
+    
+    async def _refill(self):
+        while True:
+            guild = self._next_guild()
+            if guild is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            
+            try:
+                await self.create(guild)
+            except discord.Forbidden:
+                print(f"⚠️ No permission to pre-create ticket channels in {guild.name}; not pooling there")
+                self._no_access.add(guild.id)
+            except Exception as e:
+                print(f"Error pre-creating ticket channel in {guild.name}: {e}")
+            await asyncio.sleep(self.refill_interval)
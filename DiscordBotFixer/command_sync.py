@@ -0,0 +1,53 @@
+import json
+import hashlib
+
+def command_tree_hash(tree):
+    """Stable hash of the global command payload that tree.sync() would upload"""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands()),
+        key=lambda c: (c.get('type', 1), c['name'])
+    )
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+class CommandSyncer:
+    """Syncs the global command tree only when it changed since the last successful sync.
+
+    The hash of the last synced tree is stored in the database per application,
+    so restarts, reconnects and other processes running the same bot skip the
+    upload (and the global rate limit it spends) unless forced.
+    """
+
+    def __init__(self, bot, db):
+        self.bot = bot
+        self.db = db
+        self._synced_hash = None
+    
+    def _key(self):
+        return f"command_tree_hash:{self.bot.application_id}"
+    
+    async def sync(self, force=False):
+        """Returns the number of commands uploaded, or None if the sync was skipped"""
+        local_hash = command_tree_hash(self.bot.tree)
+        if not force:
+            if local_hash == self._synced_hash:
+                return None
+            try:
+                stored_hash = await self.db.get_metadata(self._key())
+            except Exception as e:
+                # Can't tell whether Discord is current; syncing is the safe choice
+                print(f"Error reading command tree hash: {e}")
+                stored_hash = None
+            if stored_hash == local_hash:
+                self._synced_hash = local_hash
+                print("⏭️ Command tree unchanged since last sync, skipping")
+                return None
+        
+        synced = await self.bot.tree.sync()
+        self._synced_hash = local_hash
+        try:
+            await self.db.set_metadata(self._key(), local_hash)
+        except Exception as e:
+            print(f"Error saving command tree hash: {e}")
+        print(f"🔄 Synced {len(synced)} commands")
+        return len(synced)
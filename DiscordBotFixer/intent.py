@@ -0,0 +1,60 @@
+import re
+
+YES = 'yes'
+NO = 'no'
+AMBIGUOUS = 'ambiguous'
+
+# Accepted only when they are the whole reply ("sure", not "not sure")
+DEFAULT_YES_EXACT = ('y', 'yes', 'yeah', 'yep', 'yup', 'sure', 'ok', 'okay',
+                     'definitely', 'absolutely', 'correct', 'right', 'true')
+DEFAULT_NO_EXACT = ('n', 'no', 'nope', 'nah', 'never', 'not', 'negative',
+                    'incorrect', 'wrong', 'false')
+
+# Accepted as a whole word anywhere in the reply
+DEFAULT_YES_WORDS = ('yes', 'yeah')
+DEFAULT_NO_WORDS = ('no', 'nope', 'not')
+
+# Trimmed before the whole-reply check so "ok!" counts like "ok"
+_TRIM = " \t\r\n.!?,"
+
+class IntentClassifier:
+    """Classifies a free-text reply as yes, no or ambiguous.
+
+    The reply is first checked against the whole-reply vocabularies with a set
+    lookup. Otherwise one precompiled alternation scans it once; when it
+    contains both yes and no words (e.g. "yes not really") the earliest word
+    decides. Replies with no recognised word are ambiguous.
+    """
+
+    def __init__(self, yes_exact=DEFAULT_YES_EXACT, no_exact=DEFAULT_NO_EXACT,
+                 yes_words=DEFAULT_YES_WORDS, no_words=DEFAULT_NO_WORDS):
+        self.yes_exact = frozenset(w.lower() for w in yes_exact)
+        self.no_exact = frozenset(w.lower() for w in no_exact)
+        overlap = (self.yes_exact & self.no_exact) | (set(yes_words) & set(no_words))
+        if overlap:
+            raise ValueError(f"Words cannot be both yes and no: {sorted(overlap)}")
+        
+        # Longest first so e.g. "nope" isn't shadowed by "no" inside the alternation
+        def alternation(words):
+            return '|'.join(re.escape(w.lower()) for w in sorted(words, key=len, reverse=True))
+        self._pattern = re.compile(
+            rf"\b(?:(?P<yes>{alternation(yes_words)})|(?P<no>{alternation(no_words)}))\b"
+        )
+    
+    def classify(self, text):
+        text = text.lower().strip(_TRIM)
+        if text in self.yes_exact:
+            return YES
+        if text in self.no_exact:
+            return NO
+        
+        match = self._pattern.search(text)
+        if match is None:
+            return AMBIGUOUS
+        return YES if match.lastgroup == 'yes' else NO
+
+_default_classifier = IntentClassifier()
+
+def classify_response(text):
+    """Classify a reply with the default vocabulary"""
+    return _default_classifier.classify(text)
@@ -0,0 +1,204 @@
+"""Run the bot as several worker processes, each owning a range of shards.
+
+    python launcher.py                 # Discord's recommended shard count, SHARD_WORKERS workers
+    SHARD_COUNT=8 SHARD_WORKERS=4 python launcher.py
+
+Each worker is a normal `python bot.py` (or BOT_SCRIPT) process started with
+SHARD_COUNT / SHARD_IDS, so it runs an AutoShardedBot for just its shards.
+The launcher relays cache invalidations between workers, collects per-shard
+health heartbeats, prints a health summary and restarts workers that exit.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import secrets
+import threading
+import subprocess
+import urllib.request
+from multiprocessing.connection import Listener
+from dotenv import load_dotenv
+
+HEALTH_REPORT_INTERVAL = 60
+HEARTBEAT_STALE_AFTER = 90
+# A worker that stayed up this long starts its restart backoff from scratch
+STABLE_AFTER = 600
+
+def recommended_shard_count(token):
+    request = urllib.request.Request(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}", "User-Agent": "DiscordBot (launcher, 1.0)"}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)["shards"]
+
+def split_shards(shard_count, workers):
+    """Contiguous, near-equal shard ranges; never more workers than shards"""
+    workers = max(1, min(workers, shard_count))
+    base, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for i in range(workers):
+        size = base + (1 if i < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+class ShardBus:
+    """Relays messages between workers and records their health heartbeats"""
+    
+    def __init__(self, authkey):
+        self.listener = Listener(("127.0.0.1", 0), authkey=authkey)
+        self.address = "%s:%d" % self.listener.address
+        self._conns = []
+        self._lock = threading.Lock()
+        self.health = {}  # worker ID -> (received_at, payload)
+    
+    def serve_forever(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except Exception as e:
+                print(f"Shard bus rejected a connection: {e}")
+                continue
+            with self._lock:
+                self._conns.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+    
+    def _serve(self, conn):
+        try:
+            while True:
+                message = conn.recv()
+                kind, worker_id, payload = message
+                if kind == "health":
+                    self.health[worker_id] = (time.monotonic(), payload)
+                    continue
+                with self._lock:
+                    others = [c for c in self._conns if c is not conn]
+                for other in others:
+                    try:
+                        other.send(message)
+                    except (OSError, EOFError):
+                        pass
+        except (OSError, EOFError):
+            pass
+        finally:
+            with self._lock:
+                if conn in self._conns:
+                    self._conns.remove(conn)
+            conn.close()
+
+class Worker:
+    def __init__(self, worker_id, shard_ids, shard_count, script, bus, authkey):
+        self.worker_id = worker_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.script = script
+        self.bus = bus
+        self.authkey = authkey
+        self.process = None
+        self.restarts = 0
+        self.started_at = None
+        self.restart_at = None  # monotonic time of a scheduled restart
+    
+    def start(self):
+        env = dict(os.environ)
+        env.update(
+            SHARD_COUNT=str(self.shard_count),
+            SHARD_IDS=",".join(map(str, self.shard_ids)),
+            SHARD_WORKER_ID=str(self.worker_id),
+            SHARD_BUS_ADDRESS=self.bus.address,
+            SHARD_BUS_AUTHKEY=self.authkey.hex(),
+        )
+        # Give every worker its own metrics port
+        metrics_port = int(os.getenv("METRICS_PORT", "9108"))
+        if metrics_port:
+            env["METRICS_PORT"] = str(metrics_port + self.worker_id)
+        self.process = subprocess.Popen([sys.executable, self.script], env=env)
+        self.started_at = time.monotonic()
+        print(f"🚀 Worker {self.worker_id} (pid {self.process.pid}) running shards {self.shard_ids}")
+
+def print_health(workers, bus):
+    now = time.monotonic()
+    for worker in workers:
+        received = bus.health.get(worker.worker_id)
+        if received is None:
+            print(f"🩺 Worker {worker.worker_id}: no heartbeat yet")
+            continue
+        received_at, payload = received
+        stale = " (STALE)" if now - received_at > HEARTBEAT_STALE_AFTER else ""
+        shards = ", ".join(
+            f"#{shard_id} {'up' if info['up'] else 'DOWN'} {info['latency'] * 1000:.0f}ms"
+            for shard_id, info in sorted(payload["shards"].items(), key=lambda item: int(item[0]))
+        )
+        print(f"🩺 Worker {worker.worker_id}{stale}: {payload['guilds']} guilds | {shards}")
+
+def main():
+    load_dotenv()
+    token = os.getenv("DISCORD_TOKEN")
+    if not token:
+        raise Exception("DISCORD_TOKEN not found. Please set DISCORD_TOKEN in your .env file.")
+    
+    shard_count = int(os.getenv("SHARD_COUNT", "0")) or recommended_shard_count(token)
+    worker_count = int(os.getenv("SHARD_WORKERS", str(os.cpu_count() or 1)))
+    script = os.getenv("BOT_SCRIPT", "bot.py")
+    
+    authkey = secrets.token_bytes(32)
+    bus = ShardBus(authkey)
+    threading.Thread(target=bus.serve_forever, name="shard-bus", daemon=True).start()
+    
+    workers = [
+        Worker(i, shard_ids, shard_count, script, bus, authkey)
+        for i, shard_ids in enumerate(split_shards(shard_count, worker_count))
+    ]
+    print(f"Launching {len(workers)} workers for {shard_count} shards")
+    for worker in workers:
+        worker.start()
+    
+    stopping = False
+    
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for worker in workers:
+            if worker.process and worker.process.poll() is None:
+                worker.process.terminate()
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    
+    next_report = time.monotonic() + HEALTH_REPORT_INTERVAL
+    while not stopping:
+        time.sleep(1)
+        now = time.monotonic()
+        for worker in workers:
+            if stopping:
+                break
+            # Restarts are scheduled, not slept on, so one crashing worker never holds up the others
+            if worker.restart_at is not None:
+                if now >= worker.restart_at:
+                    worker.restart_at = None
+                    worker.start()
+                continue
+            
+            code = worker.process.poll()
+            if now - worker.started_at >= STABLE_AFTER:
+                worker.restarts = 0
+            if code is None:
+                continue
+            worker.restarts += 1
+            delay = min(300, 5 * 2 ** min(worker.restarts - 1, 6))
+            print(f"⚠️ Worker {worker.worker_id} exited with code {code}; restarting in {delay}s")
+            worker.restart_at = now + delay
+        if time.monotonic() >= next_report:
+            next_report = time.monotonic() + HEALTH_REPORT_INTERVAL
+            print_health(workers, bus)
+    
+    for worker in workers:
+        try:
+            worker.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            worker.process.kill()
+
+if __name__ == "__main__":
+    main()
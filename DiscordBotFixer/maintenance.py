@@ -0,0 +1,115 @@
+import time
+import asyncio
+import discord
+from metrics import registry
+
+SWEEPER_ROWS = registry.counter(
+    'bot_ticket_sweeper_rows_total', 'ticket_conversations rows processed by the retention sweeper', ('action',))
+
+class TicketSweeper:
+    """Background retention for ``ticket_conversations``.
+    
+    Every ``interval`` seconds it walks the open rows in id order, ``batch_size``
+    at a time, and marks tickets whose channel no longer exists as closed. It
+    then removes rows closed more than ``retention_days`` ago, moving them to
+    ``ticket_conversations_archive`` unless ``archive`` is off. Every batch is
+    its own short transaction, with a pause in between, so the sweeper never
+    holds locks for long or floods the database pool.
+    
+    A channel missing from the client cache only counts as gone if this
+    process sees every shard and all guilds are available. Otherwise Discord
+    is asked first, because an outage or another worker's shard can hide a
+    channel that still exists.
+    """
+    
+    def __init__(self, bot, db, tickets, interval=3600.0, retention_days=90, batch_size=500,
+                 archive=True, batch_pause=0.5, full_view=True):
+        self.bot = bot
+        self.db = db
+        self.tickets = tickets
+        self.interval = interval
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.archive = archive
+        self.batch_pause = batch_pause
+        self.full_view = full_view
+        self.last_run = None
+        self._task = None
+    
+    def start(self):
+        if self.interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"Error sweeping ticket conversations: {e}")
+            await asyncio.sleep(self.interval)
+    
+    async def _channel_gone(self, channel_id, trust_cache):
+        if self.bot.get_channel(channel_id) is not None:
+            return False
+        if trust_cache:
+            return True
+        try:
+            await self.bot.fetch_channel(channel_id)
+            return False
+        except (discord.NotFound, discord.Forbidden):
+            return True
+        except discord.HTTPException:
+            # Can't tell; try again next sweep
+            return False
+    
+    async def close_missing(self):
+        trust_cache = self.full_view and not any(guild.unavailable for guild in self.bot.guilds)
+        closed = 0
+        after_id = 0
+        while True:
+            rows = await self.db.open_ticket_channels(after_id, self.batch_size)
+            if not rows:
+                break
+            after_id = rows[-1][0]
+            gone = [channel_id for _, channel_id in rows if await self._channel_gone(channel_id, trust_cache)]
+            if gone:
+                closed += await self.db.close_ticket_conversations(gone)
+                for channel_id in gone:
+                    self.tickets.forget(channel_id)
+            if len(rows) < self.batch_size:
+                break
+            await asyncio.sleep(self.batch_pause)
+        return closed
+    
+    async def purge_expired(self):
+        removed = 0
+        while True:
+            count = await self.db.purge_closed_ticket_conversations(self.retention_days, self.batch_size, self.archive)
+            removed += count
+            if count < self.batch_size:
+                break
+            await asyncio.sleep(self.batch_pause)
+        return removed
+    
+    async def sweep(self):
+        """One full pass; returns and records {'closed': n, 'archived' or 'deleted': n, 'seconds': s}"""
+        start = time.perf_counter()
+        closed = await self.close_missing()
+        SWEEPER_ROWS.inc(closed, action='closed')
+        removed = await self.purge_expired()
+        action = 'archived' if self.archive else 'deleted'
+        SWEEPER_ROWS.inc(removed, action=action)
+        
+        self.last_run = {'closed': closed, action: removed, 'seconds': time.perf_counter() - start}
+        print(f"🧹 Ticket sweep: {self.summary()}")
+        return self.last_run
+    
+    def summary(self):
+        if self.last_run is None:
+            return "not run yet"
+        action = 'archived' if self.archive else 'deleted'
+        return (f"closed {self.last_run['closed']} tickets with deleted channels, "
+                f"{action} {self.last_run[action]} closed more than {self.retention_days} days ago "
+                f"({self.last_run['seconds']:.1f}s)")
@@ -0,0 +1,60 @@
+import asyncio
+import discord
+from cache import TTLCache, MISSING
+
+class MemberResolver:
+    """Guild members for role checks when discord.py's member cache is off.
+    
+    Interaction and message payloads already carry the member with its roles,
+    so those objects are used as-is and remembered. Anything else (a plain
+    User, or a member another object refers to) is looked up in the client
+    cache, then in a small short-lived cache, and only then fetched from the
+    API. Concurrent lookups for the same member share one fetch; members that
+    aren't in the guild are cached as negative entries.
+    """
+    
+    def __init__(self, maxsize=5000, ttl=60.0, negative_ttl=30.0):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, negative_ttl=negative_ttl)
+        self.fetches = 0
+        self._inflight = {}  # (guild ID, user ID) -> fetch task
+    
+    async def resolve(self, guild, user):
+        """The Member for ``user`` (a User, Member or ID) in ``guild``, or None"""
+        user_guild = getattr(user, 'guild', None)
+        if user_guild is not None and user_guild.id == guild.id:
+            self.cache.set((guild.id, user.id), user)
+            return user
+        
+        user_id = getattr(user, 'id', user)
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+        
+        key = (guild.id, user_id)
+        cached = self.cache.get(key)
+        if cached is not MISSING:
+            return cached
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(self._fetch(guild, user_id))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await task
+    
+    async def _fetch(self, guild, user_id):
+        self.fetches += 1
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            member = None
+        except discord.HTTPException as e:
+            # Don't cache transient failures
+            print(f"Error fetching member {user_id}: {e}")
+            return None
+        self.cache.set((guild.id, user_id), member)
+        return member
+    
+    def stats(self):
+        stats = self.cache.stats()
+        stats['fetches'] = self.fetches
+        return stats
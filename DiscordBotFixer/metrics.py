@@ -0,0 +1,373 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import functools
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+# Seconds; covers cache hits through slow Discord API calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(n, "") for n in self.labelnames), 0)
+    
+    def total(self):
+        return sum(self._values.values())
+    
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Gauge:
+    """Gauge read from ``func`` at scrape time; ``func`` returns a number or a {label value: number} dict"""
+
+    def __init__(self, name, help, func, labelname=None):
+        self.name = name
+        self.help = help
+        self.func = func
+        self.labelname = labelname
+    
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            value = self.func()
+        except Exception as e:
+            print(f"Error reading gauge {self.name}: {e}")
+            return lines
+        if isinstance(value, dict):
+            for label, v in sorted(value.items()):
+                lines.append(f"{self.name}{_format_labels((self.labelname,), (label,))} {float(v)}")
+        else:
+            lines.append(f"{self.name} {float(value)}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics), one series per label set"""
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+    
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+    
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def summary(self):
+        """{label values: (count, sum, p50, p99)} with quantiles estimated from bucket bounds"""
+        result = {}
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in items:
+            counts = series[:-1]
+            count = sum(counts)
+            result[key] = (count, series[-1], self._quantile(counts, count, 0.5), self._quantile(counts, count, 0.99))
+        return result
+    
+    def _quantile(self, counts, count, q):
+        if not count:
+            return 0.0
+        target = q * count
+        running = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            running += bucket_count
+            if running >= target:
+                return bound
+        return float('inf')
+    
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            running = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), series[:-1]):
+                running += bucket_count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', le)])} {running}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {running}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+    
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+    
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+    
+    def gauge(self, name, help, func, labelname=None):
+        return self._register(Gauge(name, help, func, labelname))
+    
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Process-wide registry and the standard bot metrics
+registry = MetricsRegistry()
+
+HANDLER_LATENCY = registry.histogram(
+    'bot_handler_seconds', 'Event handler and slash command latency', ('handler',))
+HANDLER_ERRORS = registry.counter(
+    'bot_handler_errors_total', 'Unhandled exceptions raised by event handlers and slash commands', ('handler',))
+DB_QUERY_LATENCY = registry.histogram(
+    'bot_db_query_seconds', 'Database call execution time on the worker pool', ('query',))
+DB_QUEUE_WAIT = registry.histogram(
+    'bot_db_queue_wait_seconds', 'Time database calls waited for a worker', ('query',))
+DB_QUERY_ERRORS = registry.counter(
+    'bot_db_query_errors_total', 'Database calls that raised', ('query',))
+DB_CHANGE_NOTIFICATIONS = registry.counter(
+    'bot_db_change_notifications_total', 'Change notifications received from other processes', ('kind',))
+DB_CHANGE_LAG = registry.histogram(
+    'bot_db_change_lag_seconds', 'Time from another process committing a change until this one received it')
+API_REQUESTS = registry.counter(
+    'bot_discord_api_requests_total', 'Discord REST requests', ('method', 'route'))
+API_LATENCY = registry.histogram(
+    'bot_discord_api_seconds', 'Discord REST request latency, including rate limit waits', ('method', 'route'))
+API_RATE_LIMITS = registry.counter(
+    'bot_discord_rate_limits_total', 'Discord 429 responses', ('scope',))
+LOOP_LAG = registry.histogram(
+    'bot_event_loop_lag_seconds', 'How late the event loop woke up a periodic sampler')
+
+def instrument(handler):
+    """Record latency and errors of an async event handler or slash command callback"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                HANDLER_ERRORS.inc(handler=handler)
+                raise
+            finally:
+                HANDLER_LATENCY.observe(time.perf_counter() - start, handler=handler)
+        return wrapper
+    return decorator
+
+class _RateLimitLogHandler(logging.Handler):
+    """discord.py retries 429s internally and only logs them; count those log records.
+    
+    Every 429 logs "responded with 429", and a global one then also logs
+    "Global rate limit has been hit" before discord.py yields to the loop. So
+    route 429s are only counted on the next loop iteration, after any global
+    record has claimed its 429.
+    """
+
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self._unclaimed = 0
+
+    def emit(self, record):
+        message = record.getMessage()
+        if 'Global rate limit has been hit' in message:
+            self._unclaimed = max(0, self._unclaimed - 1)
+            API_RATE_LIMITS.inc(scope='global')
+        elif 'responded with 429' in message:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                API_RATE_LIMITS.inc(scope='route')
+                return
+            self._unclaimed += 1
+            loop.call_soon(self._count_routes)
+
+    def _count_routes(self):
+        if self._unclaimed:
+            API_RATE_LIMITS.inc(self._unclaimed, scope='route')
+            self._unclaimed = 0
+
+def instrument_http(client):
+    """Count and time every Discord REST request the client makes"""
+    http = client.http
+    if getattr(http, '_instrumented', False):
+        return
+    original = http.request
+    
+    async def request(route, **kwargs):
+        labels = {'method': route.method, 'route': route.path}
+        API_REQUESTS.inc(**labels)
+        start = time.perf_counter()
+        try:
+            return await original(route, **kwargs)
+        finally:
+            API_LATENCY.observe(time.perf_counter() - start, **labels)
+    
+    http.request = request
+    http._instrumented = True
+    logging.getLogger('discord.http').addHandler(_RateLimitLogHandler(level=logging.WARNING))
+
+def format_histogram(histogram, limit=10):
+    """Human-readable "label: count, p50, p99" lines, busiest series first"""
+    rows = sorted(histogram.summary().items(), key=lambda item: item[1][0], reverse=True)
+    lines = []
+    for key, (count, _, p50, p99) in rows[:limit]:
+        label = "/".join(key) or histogram.name
+        lines.append(f"`{label}`: {count} calls, p50 ≤{p50 * 1000:g}ms, p99 ≤{p99 * 1000:g}ms")
+    return lines
+
+def process_rss_bytes():
+    """Current resident set size; falls back to peak RSS where /proc isn't available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+class MetricsServer:
+    """Minimal HTTP server exposing the registry in Prometheus text format at /metrics"""
+
+    def __init__(self, host='127.0.0.1', port=9108, registry=registry):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._server = None
+    
+    async def start(self):
+        if self._server is not None:
+            return
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        print(f"📈 Metrics available at http://{self.host}:{self.port}/metrics")
+    
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Drain headers; we don't need any of them
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+                status, content_type, body = '200 OK', 'text/plain; version=0.0.4', self.registry.render()
+            else:
+                status, content_type, body = '404 Not Found', 'text/plain', 'not found\n'
+            payload = body.encode('utf-8')
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode('latin-1') + payload
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+    
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+class LoopLagMonitor:
+    """Measures how long the event loop is blocked.
+
+    A background task sleeps for ``interval`` seconds and records how much later
+    than requested it woke up. Any synchronous work on the loop (blocking I/O,
+    heavy CPU) shows up directly as lag.
+    """
+
+    def __init__(self, interval=0.5, warn_threshold=0.25, window=1200):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self._samples = deque(maxlen=window)
+        self._max = 0.0
+        self._total = 0.0
+        self._count = 0
+        self._task = None
+    
+    def start(self):
+        # on_ready fires again after reconnects; only ever run one sampler
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+    
+    def record(self, lag):
+        LOOP_LAG.observe(lag)
+        self._samples.append(lag)
+        self._max = max(self._max, lag)
+        self._total += lag
+        self._count += 1
+        if lag >= self.warn_threshold:
+            print(f"⚠️ Event loop stalled for {lag * 1000:.0f}ms")
+    
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - start - self.interval))
+    
+    def snapshot(self):
+        """Lag summary in milliseconds over the recent window (max/avg are lifetime)"""
+        recent = sorted(self._samples)
+        if not recent:
+            return {'samples': 0, 'last_ms': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0, 'avg_ms': 0.0}
+        return {
+            'samples': self._count,
+            'last_ms': self._samples[-1] * 1000,
+            'p50_ms': recent[len(recent) // 2] * 1000,
+            'p99_ms': recent[min(len(recent) - 1, int(len(recent) * 0.99))] * 1000,
+            'max_ms': self._max * 1000,
+            'avg_ms': self._total / self._count * 1000,
+        }
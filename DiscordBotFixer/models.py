@@ -1,7 +1,368 @@
 import os
+import json
+import time
+import uuid
+import select
+import asyncio
+import threading
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from cache import TTLCache, MISSING
+from metrics import DB_QUERY_LATENCY, DB_QUEUE_WAIT, DB_QUERY_ERRORS, DB_CHANGE_NOTIFICATIONS, DB_CHANGE_LAG
+
+# Arbitrary key for pg_advisory_lock so only one process migrates at a time
+MIGRATION_LOCK_ID = 720_431_815
+
+# NOTIFY channel carrying committed changes to every process using the database
+CHANGE_CHANNEL = 'bot_changes'
+
+# Ordered schema migrations: (version, description, statements).
+# Append new entries; never edit one that has already shipped.
+MIGRATIONS = [
+    (1, "Create roblox_users and ticket_conversations", [
+        """
+        CREATE TABLE IF NOT EXISTS roblox_users (
+            discord_user_id BIGINT PRIMARY KEY,
+            roblox_username VARCHAR(50) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ticket_conversations (
+            id SERIAL PRIMARY KEY,
+            discord_user_id BIGINT NOT NULL,
+            channel_id BIGINT NOT NULL,
+            conversation_state VARCHAR(50) DEFAULT 'started',
+            is_reporting_member BOOLEAN DEFAULT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+    ]),
+    (2, "Unique index on ticket_conversations.channel_id", [
+        # Older deployments could insert several rows per channel; keep the newest
+        """
+        DELETE FROM ticket_conversations t
+        USING ticket_conversations newer
+        WHERE t.channel_id = newer.channel_id AND t.id < newer.id;
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS ticket_conversations_channel_id_key
+        ON ticket_conversations (channel_id);
+        """,
+    ]),
+    (3, "Index ticket_conversations on (discord_user_id, conversation_state)", [
+        """
+        CREATE INDEX IF NOT EXISTS ticket_conversations_user_state_idx
+        ON ticket_conversations (discord_user_id, conversation_state);
+        """,
+    ]),
+    (4, "Add ticket_conversations.closed_at", [
+        "ALTER TABLE ticket_conversations ADD COLUMN IF NOT EXISTS closed_at TIMESTAMP;",
+    ]),
+    (5, "Create bot_metadata", [
+        """
+        CREATE TABLE IF NOT EXISTS bot_metadata (
+            key VARCHAR(200) PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+    ]),
+    (6, "Add ticket_conversations.transcript_path", [
+        "ALTER TABLE ticket_conversations ADD COLUMN IF NOT EXISTS transcript_path TEXT;",
+    ]),
+    (7, "Retention: closed_at/open indexes and ticket_conversations_archive", [
+        """
+        CREATE INDEX IF NOT EXISTS ticket_conversations_closed_at_idx
+        ON ticket_conversations (closed_at) WHERE closed_at IS NOT NULL;
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS ticket_conversations_open_idx
+        ON ticket_conversations (id) WHERE closed_at IS NULL;
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ticket_conversations_archive (
+            id INTEGER PRIMARY KEY,
+            discord_user_id BIGINT NOT NULL,
+            channel_id BIGINT NOT NULL,
+            conversation_state VARCHAR(50),
+            is_reporting_member BOOLEAN,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            closed_at TIMESTAMP,
+            transcript_path TEXT,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+    ]),
+]
+
+class PoolExhaustedError(Exception):
+    """Raised when no pooled connection became free within the checkout timeout"""
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of psycopg2 connections.
+
+    Idle connections are reused most-recently-used first. A connection that has
+    been idle longer than ``health_check_after`` seconds is pinged with
+    ``SELECT 1`` before it is handed out, so connections killed by a Postgres
+    restart are discarded and replaced instead of failing the caller's query.
+    """
+
+    def __init__(self, dsn, min_size=1, max_size=10, checkout_timeout=10.0, health_check_after=30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool bounds: need 0 <= min_size <= max_size and max_size >= 1")
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after
+
+        self._idle = []  # list of (connection, last_returned_monotonic)
+        self._size = 0   # open connections, idle + checked out
+        self._cond = threading.Condition()
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'health_check_failures': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+        }
+
+        for _ in range(min_size):
+            conn = self._connect()
+            self._idle.append((conn, time.monotonic()))
+            self._size += 1
+            self._stats['created'] += 1
+
+    def _connect(self):
+        # Keepalives so a server that went away is noticed instead of hanging a query for minutes
+        return psycopg2.connect(self.dsn, keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3)
+
+    def _is_healthy(self, conn, idle_since):
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            with self._cond:
+                self._stats['health_check_failures'] += 1
+            return False
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _discard(self, conn):
+        """Close a checked-out connection and free its slot"""
+        self._close_quietly(conn)
+        with self._cond:
+            self._size -= 1
+            self._stats['discarded'] += 1
+            self._cond.notify()
+
+    def getconn(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._cond:
+            self._stats['checkouts'] += 1
+        while True:
+            conn = None
+            with self._cond:
+                while True:
+                    if self._idle:
+                        # Taken out of _idle, so it already counts as checked out while it is checked
+                        conn, idle_since = self._idle.pop()
+                        break
+
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolExhaustedError(
+                            f"No database connection available after {self.checkout_timeout}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    self._stats['waits'] += 1
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                break
+            # Health check outside the lock; a dead server must not stall other checkouts and returns
+            if self._is_healthy(conn, idle_since):
+                with self._cond:
+                    self._stats['reused'] += 1
+                return conn
+            # Stale connection (e.g. Postgres restarted): drop it and try the next one
+            self._discard(conn)
+
+        # Connect outside the lock so a slow handshake does not stall other checkouts
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['created'] += 1
+        return conn
+
+    def putconn(self, conn, discard=False):
+        if not discard and not conn.closed:
+            try:
+                # Never hand out a connection with an open or aborted transaction
+                conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        if discard or conn.closed:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._close_quietly(conn)
+                self._size -= 1
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._size - len(self._idle),
+                min_size=self.min_size,
+                max_size=self.max_size,
+            )
+            return stats
+
+class ChangeListener:
+    """Dedicated ``LISTEN`` connection for changes committed by other processes.
+    
+    Runs on its own thread with its own connection, outside the pool, and
+    sleeps in ``select()`` until Postgres delivers a notification, so changes
+    from other processes arrive within milliseconds without polling. Each
+    notification is decoded and passed to ``handler(kind, payload)`` on the
+    listener thread, so the handler must be thread-safe. Notifications this
+    process sent itself are skipped.
+    
+    Notifications sent while the connection was down are lost. Callers that
+    load state should ``wait_until_listening()`` first. Whenever changes may
+    have been missed (after a reconnect, after a failed first connect, or
+    when that wait timed out), the handler gets ``('resync', {})`` once the
+    LISTEN is in place, so it can drop or reload whatever it caches.
+    """
+    
+    def __init__(self, dsn, channel, origin, handler, reconnect_delay=5.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.origin = origin
+        self.handler = handler
+        self.reconnect_delay = reconnect_delay
+        self.listening = threading.Event()
+        self._lock = threading.Lock()
+        self._missed = False  # changes may have gone unseen since the last LISTEN
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='db-listen', daemon=True)
+    
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+    
+    def stop(self):
+        self._stopping.set()
+    
+    @property
+    def connected(self):
+        return self.listening.is_set()
+    
+    def wait_until_listening(self, timeout):
+        """Block until LISTEN is in place; on timeout, the eventual connect reports 'resync'"""
+        if self.listening.wait(timeout):
+            return True
+        with self._lock:
+            if self.listening.is_set():
+                return True
+            self._missed = True
+            return False
+    
+    def _run(self):
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                # Keepalives so a dead server is noticed even when nothing is being sent
+                conn = psycopg2.connect(self.dsn, keepalives=1, keepalives_idle=30,
+                                        keepalives_interval=10, keepalives_count=3)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.channel}")
+                with self._lock:
+                    self.listening.set()
+                    missed, self._missed = self._missed, False
+                print(f"📡 Listening for database changes on '{self.channel}'")
+                if missed:
+                    self._dispatch('resync', {})
+                self._listen(conn)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError, OSError) as e:
+                if not self._stopping.is_set():
+                    print(f"Database change listener lost its connection ({e}), reconnecting in {self.reconnect_delay:.0f} seconds...")
+            finally:
+                with self._lock:
+                    self.listening.clear()
+                    self._missed = True
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            self._stopping.wait(self.reconnect_delay)
+    
+    def _listen(self, conn):
+        while not self._stopping.is_set():
+            # Wake up now and then to notice stop()
+            if not select.select([conn], [], [], 5.0)[0]:
+                continue
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                try:
+                    payload = json.loads(notify.payload)
+                except ValueError:
+                    print(f"Ignoring malformed database change notification: {notify.payload[:100]}")
+                    continue
+                if payload.pop('origin', None) == self.origin:
+                    continue
+                sent_at = payload.pop('ts', None)
+                if sent_at is not None:
+                    DB_CHANGE_LAG.observe(max(0.0, time.time() - sent_at))
+                self._dispatch(payload.pop('kind', None), payload)
+    
+    def _dispatch(self, kind, payload):
+        DB_CHANGE_NOTIFICATIONS.inc(kind=kind)
+        try:
+            self.handler(kind, payload)
+        except Exception as e:
+            print(f"Error handling database change {kind}: {e}")
 
 class DatabaseManager:
     def __init__(self):
@@ -9,11 +370,6 @@ class DatabaseManager:
         if not self.database_url:
             raise Exception("DATABASE_URL not found in environment variables")
         
-        # Initialize database and create tables
-        self._create_tables()
-    
-    @contextmanager
-    def get_connection(self):
         # Ensure SSL mode for Railway deployment
         database_url = self.database_url
         if 'sslmode=' not in database_url and ('railway' in database_url.lower() or os.getenv('RAILWAY') == 'true'):
@@ -22,39 +378,129 @@ class DatabaseManager:
             else:
                 database_url += '?sslmode=require'
         
-        conn = psycopg2.connect(database_url)
+        # Reuse connections instead of paying TCP + TLS + auth on every query
+        self.pool = ConnectionPool(
+            database_url,
+            min_size=int(os.getenv('DB_POOL_MIN', '1')),
+            max_size=int(os.getenv('DB_POOL_MAX', '10')),
+            checkout_timeout=float(os.getenv('DB_POOL_TIMEOUT', '10')),
+            health_check_after=float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', '30')),
+        )
+        
+        # Read-through cache for Roblox usernames; they almost never change
+        self.username_cache = TTLCache(
+            maxsize=int(os.getenv('USERNAME_CACHE_SIZE', '10000')),
+            ttl=float(os.getenv('USERNAME_CACHE_TTL', '3600')),
+            negative_ttl=float(os.getenv('USERNAME_CACHE_NEGATIVE_TTL', '300')),
+        )
+        
+        # Called as listener(kind, key) after a write, e.g. to tell other processes to drop cached copies
+        self.change_listeners = []
+        
+        # Writes also NOTIFY CHANGE_CHANNEL so every process on this database can update its caches
+        self.notify_changes = os.getenv('DB_CHANGE_NOTIFY', 'true').lower() == 'true'
+        self.origin = uuid.uuid4().hex
+        self.change_listener = None
+        
+        # Initialize database and apply any pending schema migrations
+        self._run_migrations()
+    
+    @contextmanager
+    def get_connection(self):
+        conn = self.pool.getconn()
+        discard = False
         try:
             yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # The server went away mid-query; don't put a dead socket back in the pool
+            discard = True
+            raise
         finally:
-            conn.close()
+            self.pool.putconn(conn, discard=discard)
+    
+    def pool_stats(self):
+        return self.pool.stats()
     
-    def _create_tables(self):
+    def close(self):
+        if self.change_listener:
+            self.change_listener.stop()
+        self.pool.closeall()
+    
+    def listen_for_changes(self, handler):
+        """Start a ChangeListener calling ``handler(kind, payload)`` for other processes' writes.
+        
+        Kinds are 'username' and 'ticket' (payload has the changed columns),
+        'ticket_closed', 'metadata', 'usernames_imported' and 'resync'. Returns None when
+        DB_CHANGE_NOTIFY is off.
+        """
+        if not self.notify_changes:
+            return None
+        if self.change_listener is None:
+            self.change_listener = ChangeListener(self.pool.dsn, CHANGE_CHANNEL, self.origin, handler)
+        self.change_listener.start()
+        return self.change_listener
+    
+    def _emit_changes(self, cur, kind, changes):
+        """NOTIFY one payload per change dict; Postgres only delivers them if the transaction commits"""
+        if not self.notify_changes or not changes:
+            return
+        now = time.time()
+        payloads = [json.dumps({'kind': kind, 'origin': self.origin, 'ts': now, **change}) for change in changes]
+        cur.execute("SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload", (CHANGE_CHANNEL, payloads))
+    
+    def _run_migrations(self):
+        """Bring the schema up to the latest version in MIGRATIONS.
+
+        When the recorded version is already current this is a single SELECT
+        and no DDL runs at all.
+        """
+        latest = MIGRATIONS[-1][0]
+        if self.schema_version() == latest:
+            return
+        
         with self.get_connection() as conn:
             with conn.cursor() as cur:
-                # Create table for storing Roblox usernames
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS roblox_users (
-                        discord_user_id BIGINT PRIMARY KEY,
-                        roblox_username VARCHAR(50) NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    );
-                """)
-                
-                # Create table for tracking ticket conversations
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS ticket_conversations (
-                        id SERIAL PRIMARY KEY,
-                        discord_user_id BIGINT NOT NULL,
-                        channel_id BIGINT NOT NULL,
-                        conversation_state VARCHAR(50) DEFAULT 'started',
-                        is_reporting_member BOOLEAN DEFAULT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    );
-                """)
-                
-                conn.commit()
+                # Serialize concurrent starters (bot.py, bot_safe.py, replicas) on the same database
+                cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+                try:
+                    cur.execute("""
+                        CREATE TABLE IF NOT EXISTS schema_version (
+                            version INTEGER PRIMARY KEY,
+                            description VARCHAR(200) NOT NULL,
+                            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        );
+                    """)
+                    conn.commit()
+                    
+                    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+                    current = cur.fetchone()[0]
+                    
+                    for version, description, statements in MIGRATIONS:
+                        if version <= current:
+                            continue
+                        for statement in statements:
+                            cur.execute(statement)
+                        cur.execute(
+                            "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                            (version, description)
+                        )
+                        # Each migration commits on its own so a failure leaves a consistent version
+                        conn.commit()
+                        print(f"🗄️ Applied database migration {version}: {description}")
+                finally:
+                    conn.rollback()
+                    cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+                    conn.commit()
+    
+    def schema_version(self):
+        """Applied schema version, or 0 if migrations have never run"""
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('schema_version') IS NOT NULL")
+                if not cur.fetchone()[0]:
+                    return 0
+                cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+                return cur.fetchone()[0]
     
     def save_roblox_username(self, discord_user_id, roblox_username):
         with self.get_connection() as conn:
@@ -65,14 +511,87 @@ class DatabaseManager:
                     ON CONFLICT (discord_user_id)
                     DO UPDATE SET roblox_username = EXCLUDED.roblox_username, updated_at = CURRENT_TIMESTAMP
                 """, (discord_user_id, roblox_username))
+                self._emit_changes(cur, 'username', [{'key': discord_user_id}])
                 conn.commit()
+        self.username_cache.invalidate(discord_user_id)
+        self._notify_change('username', discord_user_id)
+    
+    def _notify_change(self, kind, key):
+        for listener in self.change_listeners:
+            try:
+                listener(kind, key)
+            except Exception as e:
+                print(f"Error notifying change listener: {e}")
     
     def get_roblox_username(self, discord_user_id):
+        cached = self.username_cache.get(discord_user_id)
+        if cached is not MISSING:
+            return cached
+        return self.load_roblox_username(discord_user_id)
+    
+    def load_roblox_username(self, discord_user_id):
+        """Read-through lookup for callers that already counted their cache miss"""
+        cached = self.username_cache.peek(discord_user_id)
+        if cached is not MISSING:
+            return cached
+        
+        version = self.username_cache.version()
         with self.get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute("SELECT roblox_username FROM roblox_users WHERE discord_user_id = %s", (discord_user_id,))
                 result = cur.fetchone()
-                return result['roblox_username'] if result else None
+        
+        roblox_username = result['roblox_username'] if result else None
+        self.username_cache.set(discord_user_id, roblox_username, version=version)
+        return roblox_username
+    
+    def export_roblox_usernames(self, out):
+        """Stream every mapping as CSV (discord_user_id,roblox_username with a header) into ``out``"""
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.copy_expert("""
+                    COPY (SELECT discord_user_id, roblox_username FROM roblox_users ORDER BY discord_user_id)
+                    TO STDOUT WITH (FORMAT csv, HEADER true)
+                """, out)
+                return cur.rowcount
+    
+    def import_roblox_usernames(self, source, header=True):
+        """Upsert mappings from a CSV file-like ``source`` in one transaction.
+        
+        Rows are COPYed into a temporary table and merged with a single
+        INSERT ... ON CONFLICT, so nothing is held in memory on this side. If a
+        user appears more than once, the last row wins. Returns
+        (rows read, rows inserted or changed).
+        """
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TEMP TABLE roblox_users_import (
+                        line BIGSERIAL,
+                        discord_user_id BIGINT NOT NULL,
+                        roblox_username VARCHAR(50) NOT NULL
+                    ) ON COMMIT DROP
+                """)
+                cur.copy_expert(f"""
+                    COPY roblox_users_import (discord_user_id, roblox_username)
+                    FROM STDIN WITH (FORMAT csv, HEADER {'true' if header else 'false'})
+                """, source)
+                read = cur.rowcount
+                cur.execute("""
+                    INSERT INTO roblox_users (discord_user_id, roblox_username, updated_at)
+                    SELECT DISTINCT ON (discord_user_id) discord_user_id, roblox_username, CURRENT_TIMESTAMP
+                    FROM roblox_users_import
+                    ORDER BY discord_user_id, line DESC
+                    ON CONFLICT (discord_user_id)
+                    DO UPDATE SET roblox_username = EXCLUDED.roblox_username, updated_at = CURRENT_TIMESTAMP
+                    WHERE roblox_users.roblox_username IS DISTINCT FROM EXCLUDED.roblox_username
+                """)
+                changed = cur.rowcount
+                if changed:
+                    self._emit_changes(cur, 'usernames_imported', [{}])
+                conn.commit()
+        self.username_cache.clear()
+        return read, changed
     
     def save_ticket_conversation(self, discord_user_id, channel_id, conversation_state='started'):
         with self.get_connection() as conn:
@@ -80,7 +599,18 @@ class DatabaseManager:
                 cur.execute("""
                     INSERT INTO ticket_conversations (discord_user_id, channel_id, conversation_state, updated_at)
                     VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                    ON CONFLICT (channel_id) DO NOTHING
                 """, (discord_user_id, channel_id, conversation_state))
+                # Idempotent: a retry after a commit whose acknowledgement was lost finds its own row
+                if cur.rowcount == 0:
+                    conn.commit()
+                    return
+                self._emit_changes(cur, 'ticket', [{
+                    'key': channel_id,
+                    'discord_user_id': discord_user_id,
+                    'conversation_state': conversation_state,
+                    'is_reporting_member': None,
+                }])
                 conn.commit()
     
     def update_ticket_conversation(self, channel_id, conversation_state=None, is_reporting_member=None):
@@ -88,14 +618,17 @@ class DatabaseManager:
             with conn.cursor() as cur:
                 updates = []
                 params = []
+                change = {'key': channel_id}
                 
                 if conversation_state is not None:
                     updates.append("conversation_state = %s")
                     params.append(conversation_state)
+                    change['conversation_state'] = conversation_state
                 
                 if is_reporting_member is not None:
                     updates.append("is_reporting_member = %s")
                     params.append(is_reporting_member)
+                    change['is_reporting_member'] = is_reporting_member
                 
                 if updates:
                     updates.append("updated_at = CURRENT_TIMESTAMP")
@@ -103,10 +636,286 @@ class DatabaseManager:
                     
                     query = f"UPDATE ticket_conversations SET {', '.join(updates)} WHERE channel_id = %s"
                     cur.execute(query, params)
+                    self._emit_changes(cur, 'ticket', [change])
                     conn.commit()
     
+    def transition_ticket_conversation(self, channel_id, from_state, to_state, is_reporting_member=None):
+        """Check and move a ticket from ``from_state`` to ``to_state`` in one statement.
+        
+        Returns (transitioned, row_exists). ``transitioned`` is False if the
+        ticket wasn't in ``from_state``, so of several concurrent callers
+        exactly one gets True; ``row_exists`` tells that apart from there being
+        no row for the channel (yet) at all.
+        """
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    WITH moved AS (
+                        UPDATE ticket_conversations
+                        SET conversation_state = %s,
+                            is_reporting_member = COALESCE(%s, is_reporting_member),
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE channel_id = %s AND conversation_state = %s
+                        RETURNING id
+                    )
+                    SELECT EXISTS (SELECT 1 FROM moved),
+                           EXISTS (SELECT 1 FROM ticket_conversations WHERE channel_id = %s)
+                """, (to_state, is_reporting_member, channel_id, from_state, channel_id))
+                transitioned, row_exists = cur.fetchone()
+                if transitioned:
+                    change = {'key': channel_id, 'conversation_state': to_state}
+                    if is_reporting_member is not None:
+                        change['is_reporting_member'] = is_reporting_member
+                    self._emit_changes(cur, 'ticket', [change])
+                conn.commit()
+                return transitioned, row_exists
+    
+    def close_ticket_conversation(self, channel_id, transcript_path=None):
+        """Mark a ticket closed; returns False if there was no row for the channel"""
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE ticket_conversations
+                    SET closed_at = CURRENT_TIMESTAMP, transcript_path = %s, updated_at = CURRENT_TIMESTAMP
+                    WHERE channel_id = %s
+                """, (transcript_path, channel_id))
+                closed = cur.rowcount > 0
+                if closed:
+                    self._emit_changes(cur, 'ticket_closed', [{'key': channel_id}])
+                conn.commit()
+                return closed
+    
+    def open_ticket_channels(self, after_id=0, limit=500):
+        """(id, channel_id) of tickets without closed_at, in id order after ``after_id``"""
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT id, channel_id FROM ticket_conversations
+                    WHERE closed_at IS NULL AND id > %s
+                    ORDER BY id
+                    LIMIT %s
+                """, (after_id, limit))
+                return cur.fetchall()
+    
+    def close_ticket_conversations(self, channel_ids):
+        """Mark several tickets closed in one transaction; returns how many rows changed"""
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE ticket_conversations
+                    SET closed_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                    WHERE channel_id = ANY(%s) AND closed_at IS NULL
+                    RETURNING channel_id
+                """, (list(channel_ids),))
+                closed = [row[0] for row in cur.fetchall()]
+                self._emit_changes(cur, 'ticket_closed', [{'key': channel_id} for channel_id in closed])
+                conn.commit()
+                return len(closed)
+    
+    def purge_closed_ticket_conversations(self, retention_days, limit=500, archive=True):
+        """Delete (or move to ticket_conversations_archive) up to ``limit`` rows closed
+        more than ``retention_days`` ago, in one short transaction; returns the row count"""
+        expired = """
+            SELECT id FROM ticket_conversations t
+            WHERE closed_at < CURRENT_TIMESTAMP - make_interval(days => %s)
+            {skip_archived}
+            ORDER BY closed_at
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                if archive:
+                    # Copy first and delete exactly the rows that were copied, so nothing is deleted
+                    # unarchived; rows whose id is already archived are left alone rather than lost
+                    candidates = expired.format(skip_archived=
+                        "AND NOT EXISTS (SELECT 1 FROM ticket_conversations_archive a WHERE a.id = t.id)")
+                    cur.execute(f"""
+                        WITH moved AS (
+                            INSERT INTO ticket_conversations_archive
+                                (id, discord_user_id, channel_id, conversation_state, is_reporting_member,
+                                 created_at, updated_at, closed_at, transcript_path)
+                            SELECT id, discord_user_id, channel_id, conversation_state, is_reporting_member,
+                                   created_at, updated_at, closed_at, transcript_path
+                            FROM ticket_conversations
+                            WHERE id IN ({candidates})
+                            RETURNING id
+                        )
+                        DELETE FROM ticket_conversations WHERE id IN (SELECT id FROM moved)
+                    """, (retention_days, limit))
+                else:
+                    candidates = expired.format(skip_archived="")
+                    cur.execute(f"DELETE FROM ticket_conversations WHERE id IN ({candidates})", (retention_days, limit))
+                # The DELETE's count in both modes: rows actually removed from ticket_conversations
+                removed = cur.rowcount
+                conn.commit()
+                return removed
+    
     def get_ticket_conversation(self, channel_id):
         with self.get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute("SELECT * FROM ticket_conversations WHERE channel_id = %s", (channel_id,))
-                return cur.fetchone()
\ No newline at end of file
+                return cur.fetchone()
+    
+    def get_metadata(self, key):
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT value FROM bot_metadata WHERE key = %s", (key,))
+                result = cur.fetchone()
+                return result[0] if result else None
+    
+    def set_metadata(self, key, value):
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO bot_metadata (key, value, updated_at)
+                    VALUES (%s, %s, CURRENT_TIMESTAMP)
+                    ON CONFLICT (key)
+                    DO UPDATE SET value = EXCLUDED.value, updated_at = CURRENT_TIMESTAMP
+                """, (key, value))
+                self._emit_changes(cur, 'metadata', [{'key': key}])
+                conn.commit()
+    
+    def delete_metadata(self, key):
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM bot_metadata WHERE key = %s", (key,))
+                self._emit_changes(cur, 'metadata', [{'key': key}])
+                conn.commit()
+    
+    def metadata_with_prefix(self, prefix):
+        """{key: value} for every key starting with ``prefix``"""
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT key, value FROM bot_metadata WHERE left(key, %s) = %s", (len(prefix), prefix))
+                return dict(cur.fetchall())
+    
+    def load_ticket_conversations(self):
+        """Latest conversation row per open ticket channel, for hydrating in-memory state"""
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                # Closed tickets stay in the table until the retention sweep; they don't need memory
+                cur.execute("""
+                    SELECT DISTINCT ON (channel_id)
+                        channel_id, discord_user_id, conversation_state, is_reporting_member
+                    FROM ticket_conversations
+                    WHERE closed_at IS NULL
+                    ORDER BY channel_id, id DESC
+                """)
+                return cur.fetchall()
+
+class AsyncDatabaseManager:
+    """Awaitable facade over DatabaseManager for use from the discord.py event loop.
+
+    Queries run on a bounded thread pool sized to the connection pool. At most
+    ``max_pending`` calls may be queued or running at once; further callers wait
+    on a semaphore instead of piling unbounded work onto the executor. With
+    ``inline=True`` queries run directly on the event loop (the old, blocking
+    behaviour), which is useful for measuring loop stalls before and after.
+    """
+
+    def __init__(self, db, max_workers=None, max_pending=None, inline=False):
+        self.db = db
+        self.inline = inline
+        self.max_workers = max_workers or db.pool.max_size
+        self.max_pending = max_pending or self.max_workers * 4
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='db')
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._pending = 0
+    
+    async def run(self, func, *args, **kwargs):
+        name = getattr(func, '__name__', 'query')
+        submitted = time.perf_counter()
+        
+        def timed_call():
+            start = time.perf_counter()
+            DB_QUEUE_WAIT.observe(start - submitted, query=name)
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                DB_QUERY_ERRORS.inc(query=name)
+                raise
+            finally:
+                DB_QUERY_LATENCY.observe(time.perf_counter() - start, query=name)
+        
+        if self.inline:
+            return timed_call()
+        
+        async with self._slots:
+            self._pending += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, timed_call)
+            finally:
+                self._pending -= 1
+    
+    def stats(self):
+        return {
+            'inline': self.inline,
+            'pending': self._pending,
+            'max_pending': self.max_pending,
+            'max_workers': self.max_workers,
+            'pool': self.db.pool_stats(),
+            'username_cache': self.db.username_cache.stats(),
+        }
+    
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.db.close()
+    
+    async def save_roblox_username(self, discord_user_id, roblox_username):
+        return await self.run(self.db.save_roblox_username, discord_user_id, roblox_username)
+    
+    async def get_roblox_username(self, discord_user_id):
+        # Answer cache hits on the loop without a trip through the worker pool
+        cached = self.cached_roblox_username(discord_user_id)
+        if cached is not MISSING:
+            return cached
+        return await self.load_roblox_username(discord_user_id)
+    
+    async def load_roblox_username(self, discord_user_id):
+        """Database lookup after cached_roblox_username missed, without counting the miss again"""
+        return await self.run(self.db.load_roblox_username, discord_user_id)
+    
+    def cached_roblox_username(self, discord_user_id):
+        """Cached username (possibly None for "no mapping"), or MISSING; never waits"""
+        return self.db.username_cache.get(discord_user_id)
+    
+    async def save_ticket_conversation(self, discord_user_id, channel_id, conversation_state='started'):
+        return await self.run(self.db.save_ticket_conversation, discord_user_id, channel_id, conversation_state)
+    
+    async def update_ticket_conversation(self, channel_id, conversation_state=None, is_reporting_member=None):
+        return await self.run(self.db.update_ticket_conversation, channel_id, conversation_state, is_reporting_member)
+    
+    async def transition_ticket_conversation(self, channel_id, from_state, to_state, is_reporting_member=None):
+        return await self.run(self.db.transition_ticket_conversation, channel_id, from_state, to_state, is_reporting_member)
+    
+    async def close_ticket_conversation(self, channel_id, transcript_path=None):
+        return await self.run(self.db.close_ticket_conversation, channel_id, transcript_path)
+    
+    async def open_ticket_channels(self, after_id=0, limit=500):
+        return await self.run(self.db.open_ticket_channels, after_id, limit)
+    
+    async def close_ticket_conversations(self, channel_ids):
+        return await self.run(self.db.close_ticket_conversations, channel_ids)
+    
+    async def purge_closed_ticket_conversations(self, retention_days, limit=500, archive=True):
+        return await self.run(self.db.purge_closed_ticket_conversations, retention_days, limit, archive)
+    
+    async def get_ticket_conversation(self, channel_id):
+        return await self.run(self.db.get_ticket_conversation, channel_id)
+    
+    async def load_ticket_conversations(self):
+        return await self.run(self.db.load_ticket_conversations)
+    
+    async def get_metadata(self, key):
+        return await self.run(self.db.get_metadata, key)
+    
+    async def set_metadata(self, key, value):
+        return await self.run(self.db.set_metadata, key, value)
+    
+    async def delete_metadata(self, key):
+        return await self.run(self.db.delete_metadata, key)
+    
+    async def metadata_with_prefix(self, prefix):
+        return await self.run(self.db.metadata_with_prefix, prefix)
@@ -0,0 +1,176 @@
+import time
+import asyncio
+import discord
+from collections import OrderedDict, deque
+from metrics import registry
+from ratelimit import TokenBucket
+
+PRIORITY_EMERGENCY = 0
+PRIORITY_TICKET = 1
+PRIORITY_ROUTINE = 2
+PRIORITY_NAMES = {PRIORITY_EMERGENCY: 'emergency', PRIORITY_TICKET: 'ticket', PRIORITY_ROUTINE: 'routine'}
+
+# Discord allows roughly 5 messages per 5 seconds per channel
+CHANNEL_BURST = 5
+CHANNEL_REFILL_PER_SECOND = 1.0
+MAX_MESSAGE_LENGTH = 2000
+
+OUTBOUND_WAIT = registry.histogram(
+    'bot_outbound_wait_seconds', 'Time outbound messages spent queued before sending', ('priority',))
+OUTBOUND_BATCHED = registry.counter(
+    'bot_outbound_batched_total', 'Low-priority messages merged into another send while the queue was backed up')
+OUTBOUND_ERRORS = registry.counter(
+    'bot_outbound_errors_total', 'Outbound sends that failed', ('priority',))
+
+class _Job:
+    __slots__ = ('channel', 'content', 'priority', 'future', 'enqueued')
+    
+    def __init__(self, channel, content, priority, future, enqueued):
+        self.channel = channel
+        self.content = content
+        self.priority = priority
+        self.future = future
+        self.enqueued = enqueued
+
+class SendScheduler:
+    """Central, prioritized queue for channel messages.
+    
+    Emergencies go before ticket flow, which goes before everything else.
+    Each channel has a token bucket mirroring Discord's per-channel message
+    limit and at most one send in flight, so messages to one channel keep
+    their order within a priority and never queue up behind Discord's own
+    429 backoff. Channels within a priority are served round-robin. When more
+    than ``batch_threshold`` messages are waiting, queued routine messages for
+    the same channel are merged into one send.
+    """
+    
+    def __init__(self, workers=4, batch_threshold=50, clock=time.monotonic):
+        self.workers = workers
+        self.batch_threshold = batch_threshold
+        self._clock = clock
+        self._queues = {p: OrderedDict() for p in PRIORITY_NAMES}  # priority -> channel ID -> deque of jobs
+        self._depth = {p: 0 for p in PRIORITY_NAMES}
+        self._buckets = {}
+        # A bucket idle this long is full again, so it can be dropped and recreated lazily
+        self._bucket_idle = CHANNEL_BURST / CHANNEL_REFILL_PER_SECOND
+        self._next_prune = clock() + self._bucket_idle
+        self._busy = set()
+        self._wakeup = None
+        self._tasks = []
+        
+        registry.gauge('bot_outbound_queue_depth', 'Outbound messages waiting to be sent, by priority',
+                       lambda: {PRIORITY_NAMES[p]: d for p, d in self._depth.items()}, labelname='priority')
+    
+    def start(self):
+        if self._tasks and not all(t.done() for t in self._tasks):
+            return
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+    
+    def send(self, channel, content, priority=PRIORITY_ROUTINE):
+        """Queue a message; returns an awaitable resolving to the sent discord.Message"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        now = self._clock()
+        self._prune(now)
+        job = _Job(channel, content, priority, future, now)
+        self._queues[priority].setdefault(channel.id, deque()).append(job)
+        self._depth[priority] += 1
+        self._wakeup.set()
+        return future
+    
+    def depth(self):
+        return sum(self._depth.values())
+    
+    def _bucket(self, channel_id):
+        bucket = self._buckets.get(channel_id)
+        if bucket is None:
+            bucket = self._buckets[channel_id] = TokenBucket(CHANNEL_BURST, CHANNEL_REFILL_PER_SECOND, self._clock)
+        return bucket
+    
+    def _prune(self, now):
+        # Ticket channels come and go all the time; don't keep a bucket for every one ever messaged
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self._bucket_idle
+        self._buckets = {cid: b for cid, b in self._buckets.items()
+                         if now - b._updated < self._bucket_idle or cid in self._busy}
+    
+    def _next_ready(self):
+        """Pop the most urgent job whose channel can send now; else (None, seconds to wait)"""
+        wait = None
+        for priority, channels in self._queues.items():
+            for channel_id, jobs in channels.items():
+                if channel_id in self._busy:
+                    continue
+                bucket = self._bucket(channel_id)
+                delay = bucket.delay()
+                if delay > 0:
+                    wait = delay if wait is None else min(wait, delay)
+                    continue
+                
+                bucket.try_take()
+                job = jobs.popleft()
+                self._depth[priority] -= 1
+                if jobs:
+                    channels.move_to_end(channel_id)  # round-robin between channels
+                else:
+                    del channels[channel_id]
+                return job, 0.0
+        return None, wait
+    
+    def _take_batch(self, job):
+        """Merge queued routine messages for the job's channel while the queue is backed up"""
+        if job.priority != PRIORITY_ROUTINE or self.depth() < self.batch_threshold:
+            return [job]
+        
+        channels = self._queues[PRIORITY_ROUTINE]
+        jobs = channels.get(job.channel.id)
+        batch = [job]
+        length = len(job.content)
+        while jobs and length + 1 + len(jobs[0].content) <= MAX_MESSAGE_LENGTH:
+            extra = jobs.popleft()
+            length += 1 + len(extra.content)
+            batch.append(extra)
+            self._depth[PRIORITY_ROUTINE] -= 1
+            OUTBOUND_BATCHED.inc()
+        if jobs is not None and not jobs:
+            del channels[job.channel.id]
+        return batch
+    
+    async def _worker(self):
+        while True:
+            job, wait = self._next_ready()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            batch = self._take_batch(job)
+            channel_id = job.channel.id
+            self._busy.add(channel_id)
+            now = self._clock()
+            for queued in batch:
+                OUTBOUND_WAIT.observe(now - queued.enqueued, priority=PRIORITY_NAMES[queued.priority])
+            try:
+                content = "\n".join(queued.content for queued in batch)
+                message = await job.channel.send(content)
+            except Exception as e:
+                OUTBOUND_ERRORS.inc(priority=PRIORITY_NAMES[job.priority])
+                if isinstance(e, discord.HTTPException) and e.status == 429:
+                    self._bucket(channel_id).drain()
+                for queued in batch:
+                    if not queued.future.done():
+                        queued.future.set_exception(e)
+            else:
+                for queued in batch:
+                    if not queued.future.done():
+                        queued.future.set_result(message)
+            finally:
+                self._busy.discard(channel_id)
+                # The channel may have more work that other workers skipped while it was busy
+                self._wakeup.set()
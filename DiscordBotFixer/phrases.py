@@ -0,0 +1,125 @@
+import re
+from collections import deque
+
+DEFAULT_EMERGENCY_PHRASES = ("getting jumped", "need help")
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_ING = re.compile(r"ing\b")
+_REPEATS = re.compile(r"([a-z])\1+")
+
+def normalize(text):
+    """Canonical form used for both phrases and messages.
+
+    Lowercases, turns punctuation/whitespace runs into one space, treats a
+    dropped final g as the same word ("gettin" == "getting") and collapses
+    repeated letters ("heeelp" == "help"). Applying the same folding to both
+    sides gives light fuzzy matching without a fuzzy automaton.
+    """
+    text = _NON_WORD.sub(" ", text.lower())
+    text = _ING.sub("in", text)
+    text = _REPEATS.sub(r"\1", text)
+    return f" {text.strip()} "
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over normalized phrases.
+
+    Built once; ``search`` walks the normalized message a single time, so match
+    cost depends on message length, not on how many phrases there are. Phrases
+    only match on word boundaries.
+    """
+
+    def __init__(self, phrases):
+        self.phrases = tuple(phrases)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # node -> indices of phrases ending here
+        
+        for index, phrase in enumerate(self.phrases):
+            # Surrounding spaces make the automaton enforce word boundaries itself
+            key = normalize(phrase)
+            if not key.strip():
+                continue
+            node = 0
+            for char in key:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = nxt
+            self._output[node].append(index)
+        
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child].extend(self._output[self._fail[child]])
+    
+    def _walk(self, text):
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for char in normalize(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                yield output[node]
+    
+    def search(self, text):
+        """First matching phrase, or None"""
+        for indices in self._walk(text):
+            return self.phrases[indices[0]]
+        return None
+    
+    def find_all(self, text):
+        found = set()
+        for indices in self._walk(text):
+            found.update(indices)
+        return [self.phrases[i] for i in sorted(found)]
+
+class PhraseRegistry:
+    """Per-guild phrase lists with lazily built, cached matchers.
+
+    A guild's matcher is rebuilt only when its phrase list changes; guilds with
+    no override share the default matcher.
+    """
+
+    def __init__(self, default_phrases=DEFAULT_EMERGENCY_PHRASES):
+        self._default = PhraseMatcher(default_phrases)
+        self._guild_phrases = {}
+        self._matchers = {}
+    
+    def set_default_phrases(self, phrases):
+        phrases = tuple(phrases)
+        if phrases != self._default.phrases:
+            self._default = PhraseMatcher(phrases)
+    
+    def set_phrases(self, guild_id, phrases):
+        phrases = tuple(dict.fromkeys(p.strip() for p in phrases if p.strip()))
+        if self._guild_phrases.get(guild_id) == phrases:
+            return
+        self._guild_phrases[guild_id] = phrases
+        self._matchers.pop(guild_id, None)
+    
+    def clear_phrases(self, guild_id):
+        self._guild_phrases.pop(guild_id, None)
+        self._matchers.pop(guild_id, None)
+    
+    def phrases(self, guild_id):
+        return self._guild_phrases.get(guild_id, self._default.phrases)
+    
+    def matcher(self, guild_id):
+        if guild_id not in self._guild_phrases:
+            return self._default
+        matcher = self._matchers.get(guild_id)
+        if matcher is None:
+            matcher = self._matchers[guild_id] = PhraseMatcher(self._guild_phrases[guild_id])
+        return matcher
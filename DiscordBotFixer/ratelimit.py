@@ -0,0 +1,33 @@
+import time
+
+class TokenBucket:
+    def __init__(self, capacity, refill_per_second, clock=time.monotonic):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+    
+    def try_take(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+    
+    def delay(self):
+        """Seconds until a token is available (0 if one is available now)"""
+        now = self._clock()
+        tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        if tokens >= 1:
+            return 0.0
+        if not self.refill_per_second:
+            return float('inf')
+        return (1 - tokens) / self.refill_per_second
+    
+    def drain(self):
+        """Treat the bucket as exhausted, e.g. after Discord answered 429"""
+        self._tokens = 0.0
+        self._updated = self._clock()
@@ -0,0 +1,45 @@
+# Index keys are casefolded role names
+STAFF_ROLE = "staff"
+VERIFIED_ROLE = "verified"
+MEMBERS_ROLE = "members"
+
+class RoleIndex:
+    """Per-guild map of casefolded role name -> role ID.
+
+    Built once per guild and refreshed from the guild role events, so lookups
+    and permission checks are dict/ID lookups with no string work per call.
+    When several roles share a name the first in ``guild.roles`` wins, the same
+    as the old linear scan.
+    """
+
+    def __init__(self):
+        self._guilds = {}
+    
+    def rebuild(self, guild):
+        names = {}
+        for role in guild.roles:
+            names.setdefault(role.name.casefold(), role.id)
+        self._guilds[guild.id] = names
+        return names
+    
+    def forget(self, guild):
+        self._guilds.pop(guild.id, None)
+    
+    def role_id(self, guild, key):
+        """Role ID for a casefolded name (e.g. STAFF_ROLE), or None"""
+        names = self._guilds.get(guild.id)
+        if names is None:
+            names = self.rebuild(guild)
+        return names.get(key)
+    
+    def get_role(self, guild, key):
+        role_id = self.role_id(guild, key)
+        return guild.get_role(role_id) if role_id is not None else None
+    
+    def member_has(self, member, key):
+        # interaction.user is a plain User outside guilds; it has no roles
+        guild = getattr(member, 'guild', None)
+        if guild is None:
+            return False
+        role_id = self.role_id(guild, key)
+        return role_id is not None and member.get_role(role_id) is not None
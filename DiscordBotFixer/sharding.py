@@ -0,0 +1,98 @@
+import os
+import time
+import threading
+from multiprocessing.connection import Client
+from discord.ext import commands
+
+def shard_config():
+    """(shard_count, shard_ids) from SHARD_COUNT / SHARD_IDS, as set by launcher.py"""
+    shard_count = int(os.getenv('SHARD_COUNT', '0')) or None
+    shard_ids = [int(s) for s in os.getenv('SHARD_IDS', '').split(',') if s.strip()] or None
+    return shard_count, shard_ids
+
+def make_bot(intents, **kwargs):
+    """Single-connection Bot, or AutoShardedBot when sharding is configured.
+    
+    SHARDED=true runs every shard in this process (Discord's recommended
+    count unless SHARD_COUNT is set); SHARD_COUNT + SHARD_IDS run just those
+    shards, which is how launcher.py spreads shards across workers.
+    """
+    shard_count, shard_ids = shard_config()
+    if shard_ids and not shard_count:
+        raise Exception("SHARD_IDS requires SHARD_COUNT")
+    if shard_count or os.getenv('SHARDED', 'false').lower() == 'true':
+        return commands.AutoShardedBot(intents=intents, shard_count=shard_count, shard_ids=shard_ids, **kwargs)
+    return commands.Bot(intents=intents, **kwargs)
+
+def owns_shard_zero(bot):
+    """Global work (e.g. command sync) runs in exactly one worker"""
+    _, shard_ids = shard_config()
+    return shard_ids is None or 0 in shard_ids
+
+def shard_health(bot):
+    """{shard_id: {'latency': seconds, 'up': bool}} for the shards this process runs"""
+    shards = getattr(bot, 'shards', None)
+    if not shards:
+        return {0: {'latency': bot.latency, 'up': not bot.is_closed()}}
+    return {
+        shard_id: {'latency': shard.latency, 'up': not shard.is_closed()}
+        for shard_id, shard in shards.items()
+    }
+
+class ShardBusClient:
+    """Worker side of the launcher's message bus.
+    
+    Carries cache invalidations between workers (so a username saved through
+    one shard isn't served stale by another) and per-shard health heartbeats
+    to the launcher. Messages are ``(kind, payload)`` tuples; ``handler`` is
+    called on the reader thread for every message relayed from other workers,
+    so it must be thread-safe.
+    """
+    
+    def __init__(self, address, authkey, worker_id, handler):
+        self.address = address
+        self.authkey = authkey
+        self.worker_id = worker_id
+        self.handler = handler
+        self._conn = None
+        self._send_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='shard-bus', daemon=True)
+    
+    @classmethod
+    def from_env(cls, handler):
+        address = os.getenv('SHARD_BUS_ADDRESS')
+        if not address:
+            return None
+        host, port = address.rsplit(':', 1)
+        return cls((host, int(port)), bytes.fromhex(os.environ['SHARD_BUS_AUTHKEY']),
+                   int(os.getenv('SHARD_WORKER_ID', '0')), handler)
+    
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+    
+    def publish(self, kind, payload):
+        conn = self._conn
+        if conn is None:
+            return
+        try:
+            with self._send_lock:
+                conn.send((kind, self.worker_id, payload))
+        except (OSError, EOFError) as e:
+            print(f"Error publishing to shard bus: {e}")
+    
+    def _run(self):
+        while True:
+            try:
+                self._conn = Client(self.address, authkey=self.authkey)
+                print(f"🔗 Connected to shard bus at {self.address[0]}:{self.address[1]}")
+                while True:
+                    kind, _, payload = self._conn.recv()
+                    try:
+                        self.handler(kind, payload)
+                    except Exception as e:
+                        print(f"Error handling shard bus message {kind}: {e}")
+            except (OSError, EOFError) as e:
+                print(f"Shard bus connection lost ({e}), reconnecting in 5 seconds...")
+                self._conn = None
+                time.sleep(5)
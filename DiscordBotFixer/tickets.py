@@ -0,0 +1,267 @@
+import asyncio
+import discord
+import psycopg2
+
+# Every ticket channel name starts with this
+TICKET_PREFIX = "ticket-"
+
+# Errors that retrying the same write can't fix
+PERMANENT_ERRORS = (psycopg2.IntegrityError, psycopg2.ProgrammingError)
+
+# Allowed conversation transitions; anything else is ignored
+TRANSITIONS = {
+    'started': {'reporting_member', 'general_help'},
+    'reporting_member': set(),
+    'general_help': set(),
+}
+
+class TicketStateStore:
+    """In-memory ticket conversation state, keyed by channel ID.
+
+    State is bulk-loaded from ``ticket_conversations`` once at startup and then
+    read and transitioned in memory, so messages in tickets cost no database
+    query. Changes are written back in order by a single background writer;
+    the database stays the source of truth across restarts.
+    """
+
+    def __init__(self, db, max_attempts=5, retry_delay=2.0):
+        self.db = db
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._tickets = {}
+        self._hydrated = False
+        self._reload_after_hydrate = False
+        self._queue = asyncio.Queue()
+        self._writer_task = None
+    
+    async def start(self):
+        """Start the writer and hydrate from the database (safe to call on every on_ready)"""
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.get_running_loop().create_task(self._writer())
+        if not self._hydrated:
+            await self.hydrate()
+    
+    async def hydrate(self):
+        try:
+            rows = await self.db.load_ticket_conversations()
+        except Exception as e:
+            print(f"Error loading ticket conversations: {e}")
+            return
+        
+        for row in rows:
+            # Anything touched in memory while the load was running is newer than the row
+            self._tickets.setdefault(row['channel_id'], dict(row))
+        self._hydrated = True
+        print(f"🎫 Loaded {len(rows)} ticket conversations")
+        if self._reload_after_hydrate:
+            # A reload was asked for while this load was running; its rows may predate the request
+            self._reload_after_hydrate = False
+            await self.reload()
+    
+    async def get(self, channel_id):
+        ticket = self._tickets.get(channel_id)
+        if ticket is not None or self._hydrated:
+            return ticket
+        
+        # Not hydrated yet (or hydration failed): fall back to a point lookup
+        row = await self.db.get_ticket_conversation(channel_id)
+        if row:
+            ticket = self._tickets.setdefault(channel_id, dict(row))
+        return ticket
+    
+    def peek(self, channel_id):
+        """In-memory state only; never touches the database"""
+        return self._tickets.get(channel_id)
+    
+    def open(self, discord_user_id, channel_id, conversation_state='started'):
+        self._tickets[channel_id] = {
+            'channel_id': channel_id,
+            'discord_user_id': discord_user_id,
+            'conversation_state': conversation_state,
+            'is_reporting_member': None,
+        }
+        self._persist(self.db.save_ticket_conversation, discord_user_id, channel_id, conversation_state)
+    
+    async def transition(self, channel_id, conversation_state, is_reporting_member=None):
+        """Apply a transition; True only for the one caller that actually made it.
+        
+        The in-memory check and update happen without yielding to the loop, so
+        of two messages racing in this process only one gets past it, without a
+        query. That one is then confirmed with a single conditional UPDATE in
+        the database, which also rules out another process having moved the
+        ticket on. The UPDATE runs directly rather than through the writer, so
+        the reply never waits behind other tickets' writes or their retries.
+        If the ticket's row isn't there (its INSERT is still queued or failed)
+        or the database can't be reached, the in-memory decision stands and
+        the UPDATE is queued behind the INSERT instead.
+        """
+        ticket = self._tickets.get(channel_id)
+        if ticket is None or conversation_state not in TRANSITIONS.get(ticket['conversation_state'], ()):
+            return False
+        
+        previous_state = ticket['conversation_state']
+        ticket['conversation_state'] = conversation_state
+        if is_reporting_member is not None:
+            ticket['is_reporting_member'] = is_reporting_member
+        try:
+            transitioned, row_exists = await self.db.transition_ticket_conversation(
+                channel_id, previous_state, conversation_state, is_reporting_member)
+            if row_exists:
+                return transitioned
+        except Exception as e:
+            print(f"Error confirming ticket transition for channel {channel_id}: {e}")
+        self._persist(self.db.transition_ticket_conversation,
+                      channel_id, previous_state, conversation_state, is_reporting_member)
+        return True
+    
+    def forget(self, channel_id):
+        self._tickets.pop(channel_id, None)
+    
+    def apply_remote(self, channel_id, change):
+        """Fold in a change another process committed; new tickets need their discord_user_id"""
+        ticket = self._tickets.get(channel_id)
+        if ticket is not None:
+            ticket.update(change)
+        elif 'discord_user_id' in change:
+            self._tickets[channel_id] = {'channel_id': channel_id, 'is_reporting_member': None, **change}
+    
+    async def reload(self):
+        """Re-read every ticket after changes from other processes may have been missed"""
+        if not self._hydrated:
+            # hydrate() reads everything anyway, but one already running may have read too early
+            self._reload_after_hydrate = True
+            return
+        await self.flush()
+        try:
+            rows = await self.db.load_ticket_conversations()
+        except Exception as e:
+            print(f"Error reloading ticket conversations: {e}")
+            return
+        for row in rows:
+            ticket = self._tickets.get(row['channel_id'])
+            if ticket is None:
+                self._tickets[row['channel_id']] = dict(row)
+            else:
+                ticket.update(row)
+        print(f"🎫 Reloaded {len(rows)} ticket conversations")
+    
+    async def close(self, channel_id, transcript_path=None):
+        """Record the ticket as closed and wait until that's in the database.
+        
+        Goes through the writer like every other change, so it lands after the
+        ticket's own INSERT even if that is still queued. Returns False if the
+        channel has no ticket row; raises if the write kept failing.
+        """
+        return await self._persist(self.db.close_ticket_conversation, channel_id, transcript_path)
+    
+    def _persist(self, func, *args):
+        """Queue a write; returns a future for its result that callers may ignore"""
+        done = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((func, args, done))
+        return done
+    
+    async def _writer(self):
+        while True:
+            func, args, done = await self._queue.get()
+            try:
+                for attempt in range(1, self.max_attempts + 1):
+                    try:
+                        result = await func(*args)
+                        if not done.done():
+                            done.set_result(result)
+                        break
+                    except Exception as e:
+                        print(f"Error persisting ticket state (attempt {attempt}/{self.max_attempts}): {e}")
+                        if attempt < self.max_attempts and not isinstance(e, PERMANENT_ERRORS):
+                            await asyncio.sleep(self.retry_delay * attempt)
+                            continue
+                        if not done.done():
+                            done.set_exception(e)
+                            # Nobody may be waiting for this one; don't log "exception never retrieved"
+                            done.exception()
+                        break
+            finally:
+                self._queue.task_done()
+    
+    async def flush(self):
+        """Wait until every queued write has been attempted"""
+        await self._queue.join()
+    
+    def stats(self):
+        return {
+            'tickets': len(self._tickets),
+            'hydrated': self._hydrated,
+            'pending_writes': self._queue.qsize(),
+        }
+
+# Placeholder owner entry while a /ticket invocation is creating the channel
+PENDING = object()
+
+def ticket_owner_from_overwrites(channel):
+    """Best-effort owner of a ticket channel: the one non-bot member given its own overwrite"""
+    for target in channel.overwrites:
+        if isinstance(target, discord.Member) and not target.bot:
+            return target.id
+        # Uncached members (lean member cache) come back as typed Objects
+        if isinstance(target, discord.Object) and target.type is discord.Member and target.id != channel.guild.me.id:
+            return target.id
+    return None
+
+class OpenTicketIndex:
+    """Open ticket channel per (guild ID, user ID).
+
+    Rebuilt from the guild's ticket channels at startup (owners come from the
+    ticket state store, falling back to the channel's member overwrite) and
+    kept current by channel create/delete events. ``claim`` reserves a slot
+    synchronously, so concurrent /ticket invocations from one user can't both
+    create a channel.
+    """
+
+    def __init__(self):
+        self._by_owner = {}    # (guild_id, user_id) -> channel_id or PENDING
+        self._by_channel = {}  # channel_id -> (guild_id, user_id)
+    
+    def get(self, guild_id, user_id):
+        return self._by_owner.get((guild_id, user_id))
+    
+    def claim(self, guild_id, user_id):
+        """Reserve a new ticket; returns None on success, else the existing channel ID or PENDING"""
+        key = (guild_id, user_id)
+        existing = self._by_owner.get(key)
+        if existing is not None:
+            return existing
+        self._by_owner[key] = PENDING
+        return None
+    
+    def release(self, guild_id, user_id):
+        """Drop a claim whose channel was never created"""
+        if self._by_owner.get((guild_id, user_id)) is PENDING:
+            del self._by_owner[(guild_id, user_id)]
+    
+    def add(self, guild_id, user_id, channel_id):
+        self._by_owner[(guild_id, user_id)] = channel_id
+        self._by_channel[channel_id] = (guild_id, user_id)
+    
+    def remove_channel(self, channel_id):
+        key = self._by_channel.pop(channel_id, None)
+        if key is not None and self._by_owner.get(key) == channel_id:
+            del self._by_owner[key]
+    
+    def track_channel(self, channel, tickets):
+        """Index a ticket channel if its owner can be determined"""
+        if not channel.name.startswith(TICKET_PREFIX):
+            return
+        ticket = tickets.peek(channel.id)
+        owner_id = ticket['discord_user_id'] if ticket else ticket_owner_from_overwrites(channel)
+        if owner_id is not None:
+            self.add(channel.guild.id, owner_id, channel.id)
+    
+    def rebuild(self, guild, tickets):
+        for channel_id, (guild_id, _) in list(self._by_channel.items()):
+            if guild_id == guild.id:
+                self.remove_channel(channel_id)
+        for channel in guild.text_channels:
+            self.track_channel(channel, tickets)
+    
+    def __len__(self):
+        return len(self._by_channel)
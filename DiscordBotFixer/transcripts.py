@@ -0,0 +1,72 @@
+import os
+import gzip
+import json
+import time
+import asyncio
+from metrics import registry
+
+TRANSCRIPT_MESSAGES = registry.counter('bot_transcript_messages_total', 'Messages written to ticket transcripts')
+TRANSCRIPT_LATENCY = registry.histogram('bot_transcript_seconds', 'Time to archive one ticket transcript')
+
+def message_record(message):
+    return {
+        'id': message.id,
+        'author_id': message.author.id,
+        'author': str(message.author),
+        'created_at': message.created_at.isoformat() if message.created_at else None,
+        'edited_at': message.edited_at.isoformat() if getattr(message, 'edited_at', None) else None,
+        'content': message.content,
+        'attachments': [attachment.url for attachment in message.attachments],
+    }
+
+class TranscriptArchiver:
+    """Streams a channel's history into a gzipped JSONL file, oldest message first.
+
+    History is read page by page and each page is written out before the next
+    one is fetched, so memory stays bounded by ``page_size`` however long the
+    ticket is. Compression and disk writes run on a worker thread. The file is
+    written under a temporary name and renamed when complete, so a crash never
+    leaves a truncated transcript behind.
+    """
+
+    def __init__(self, directory, page_size=100):
+        self.directory = directory
+        self.page_size = page_size
+
+    def path_for(self, channel):
+        return os.path.abspath(os.path.join(
+            self.directory, str(channel.guild.id), f"{channel.id}-{int(time.time())}.jsonl.gz"))
+
+    async def archive(self, channel):
+        """Write the transcript; returns (path, message count)"""
+        start = time.perf_counter()
+        path = self.path_for(channel)
+        partial = path + ".partial"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        out = await asyncio.to_thread(gzip.open, partial, 'wt', encoding='utf-8')
+        count = 0
+        try:
+            page = []
+            async for message in channel.history(limit=None, oldest_first=True):
+                page.append(json.dumps(message_record(message), ensure_ascii=False) + "\n")
+                if len(page) >= self.page_size:
+                    await asyncio.to_thread(out.writelines, page)
+                    count += len(page)
+                    page = []
+            if page:
+                await asyncio.to_thread(out.writelines, page)
+                count += len(page)
+            await asyncio.to_thread(out.close)
+            await asyncio.to_thread(os.replace, partial, path)
+        except BaseException:
+            await asyncio.to_thread(out.close)
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+            raise
+
+        TRANSCRIPT_MESSAGES.inc(count)
+        TRANSCRIPT_LATENCY.observe(time.perf_counter() - start)
+        return path, count
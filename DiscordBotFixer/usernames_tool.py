@@ -0,0 +1,163 @@
+"""Bulk import and export of Roblox username mappings.
+
+    python usernames_tool.py export usernames.csv          # '-' writes to stdout
+    python usernames_tool.py import usernames.csv          # CSV with a discord_user_id,roblox_username header
+    python usernames_tool.py import-json ../DiscordBot/usernames.json
+
+Everything streams through PostgreSQL COPY, so memory use stays flat however
+many mappings there are. import-json reads the legacy DiscordBot snapshot
+incrementally and replays its usernames.json.log(.old) on top, the same way
+DiscordBot itself loads it. Each import is a single transaction.
+"""
+import io
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+from dotenv import load_dotenv
+
+def iter_json_object(f, chunk_size=1 << 16):
+    """Yield the (key, value) pairs of a top-level JSON object without reading it all at once"""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+    
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf, pos = buf[pos:] + chunk, 0
+    
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+    
+    def expect(chars):
+        nonlocal pos
+        skip_whitespace()
+        if pos >= len(buf) or buf[pos] not in chars:
+            raise ValueError(f"Expected one of {chars!r} in JSON object")
+        pos += 1
+        return buf[pos - 1]
+    
+    def value():
+        nonlocal pos
+        skip_whitespace()
+        while True:
+            try:
+                result, end = decoder.raw_decode(buf, pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(buf) or eof:
+                    pos = end
+                    return result
+            except ValueError:
+                if eof:
+                    raise
+            fill()
+    
+    fill()
+    expect("{")
+    skip_whitespace()
+    if buf.startswith("}", pos):
+        return
+    while True:
+        key = value()
+        expect(":")
+        yield key, value()
+        if expect(",}") == "}":
+            return
+
+def iter_legacy_usernames(path):
+    """(discord_user_id, roblox_username) from DiscordBot's usernames.json and its change logs"""
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from iter_json_object(f)
+    for log_path in (path + ".log.old", path + ".log"):
+        if not os.path.exists(log_path):
+            continue
+        with open(log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash
+                    break
+                yield entry["id"], entry["username"]
+
+class CsvStream:
+    """Read-only file object rendering (discord_user_id, roblox_username) rows as CSV for COPY"""
+    
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._pending = ""
+        self.skipped = 0
+    
+    def read(self, size=-1):
+        while size < 0 or len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            discord_user_id, roblox_username = row
+            try:
+                discord_user_id = int(discord_user_id)
+            except (TypeError, ValueError):
+                self.skipped += 1
+                continue
+            if not isinstance(roblox_username, str) or not roblox_username:
+                self.skipped += 1
+                continue
+            self._writer.writerow((discord_user_id, roblox_username))
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+        if size < 0:
+            size = len(self._pending)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("export").add_argument("path")
+    commands.add_parser("import").add_argument("path")
+    commands.add_parser("import-json").add_argument("path")
+    args = parser.parse_args()
+    
+    load_dotenv()
+    # Imported late so --help works without a database
+    from models import DatabaseManager
+    db = DatabaseManager()
+    start = time.perf_counter()
+    try:
+        if args.command == "export":
+            if args.path == "-":
+                count = db.export_roblox_usernames(sys.stdout)
+            else:
+                with open(args.path, "w", encoding="utf-8", newline="") as out:
+                    count = db.export_roblox_usernames(out)
+            print(f"✅ Exported {count} usernames in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            return
+        
+        if args.command == "import":
+            with open(args.path, "r", encoding="utf-8", newline="") as source:
+                read, changed = db.import_roblox_usernames(source)
+        else:
+            source = CsvStream(iter_legacy_usernames(args.path))
+            read, changed = db.import_roblox_usernames(source, header=False)
+            if source.skipped:
+                print(f"⚠️ Skipped {source.skipped} entries with an invalid user ID or username")
+        print(f"✅ Read {read} rows, inserted or updated {changed} usernames in {time.perf_counter() - start:.1f}s")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()